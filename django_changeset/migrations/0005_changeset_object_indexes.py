@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_changeset', '0004_object_references'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changeset',
+            index=models.Index(fields=['object_type', 'object_uuid', '-date'], name='changeset_object_uuid_date'),
+        ),
+    ]
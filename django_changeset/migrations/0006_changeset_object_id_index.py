@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_changeset', '0005_changeset_object_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changeset',
+            index=models.Index(fields=['object_type', 'object_id', '-date'], name='changeset_object_id_date'),
+        ),
+    ]
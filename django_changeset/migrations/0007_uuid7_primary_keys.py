@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:33
+
+from django.db import migrations, models
+import django_changeset.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_changeset', '0006_changeset_object_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='changerecord',
+            name='id',
+            field=models.UUIDField(default=django_changeset.models.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='Primary Key as Python UUID7 Field'),
+        ),
+        migrations.AlterField(
+            model_name='changeset',
+            name='id',
+            field=models.UUIDField(default=django_changeset.models.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='Primary Key as Python UUID7 Field'),
+        ),
+    ]
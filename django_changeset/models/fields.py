@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from django.db import models
 from django.contrib.contenttypes.fields import GenericRelation
 
 
@@ -1,14 +1,21 @@
 # -*- coding: utf-8 -*-
+import json
 import logging
-from functools import reduce
-from threading import local
-from contextlib import contextmanager
+from collections import namedtuple
+from functools import lru_cache, reduce
+from operator import attrgetter, or_
+from contextvars import ContextVar
+from contextlib import contextmanager, ContextDecorator
 
 from django import forms
+from django.apps import apps
 from django.core import serializers
-from django.db import models
-from django.db.models import options, ManyToManyRel
-from django.db.models.signals import pre_save, post_save, post_init, m2m_changed
+from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import options, ManyToManyRel, Prefetch, Q, Subquery, Value
+from django.db.models.functions import Cast
+from django.db.models.signals import class_prepared, pre_save, post_save, post_init, post_migrate, m2m_changed
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
@@ -17,6 +24,17 @@ from django.utils.translation import gettext_lazy as _
 from django_userforeignkey.request import get_current_user
 from django_userforeignkey.models.fields import UserForeignKey
 from django_changeset.models import ChangeSet, ChangeRecord
+from django_changeset.models.models import changeset_related_object
+
+
+@lru_cache(maxsize=1024)
+def _orm_attrgetter(key):
+    """
+    Returns an attrgetter for the given orm lookup key (e.g., 'parent__name' --> attrgetter('parent.name'))
+    :param key:
+    :return: callable
+    """
+    return attrgetter(key.replace('__', '.'))
 
 
 def getattr_orm(instance, key):
@@ -27,11 +45,457 @@ def getattr_orm(instance, key):
     :param key:
     :return:
     """
-    return reduce(getattr, [instance] + key.split('__'))
+    return _orm_attrgetter(key)(instance)
 
 
 logger = logging.getLogger(__name__)
-_thread_locals = local()
+
+# state of the current thread or task (context variables are also isolated between tasks of async code)
+_is_enabled = ContextVar('django_changeset_is_enabled', default=True)
+_is_related_enabled = ContextVar('django_changeset_is_related_enabled', default=True)
+_revision_batch = ContextVar('django_changeset_revision_batch', default=None)
+_is_original_data_enabled = ContextVar('django_changeset_is_original_data_enabled', default=True)
+
+
+class ContextVarState(ContextDecorator):
+    """
+    Context manager (or decorator) which sets a context variable to the given state, and restores the previous state
+    when the context is left (a plain class, as this is cheaper than a generator based context manager)
+    """
+    __slots__ = ('context_var', 'state', 'token')
+
+    def __init__(self, context_var, state):
+        self.context_var = context_var
+        self.state = state
+        self.token = None
+
+    def _recreate_cm(self):
+        # every call of a decorated function needs its own token
+        return self.__class__(self.context_var, self.state)
+
+    def __enter__(self):
+        self.token = self.context_var.set(self.state)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context_var.reset(self.token)
+
+
+# maximum number of changesets or change records inserted by a single bulk create query
+CHANGE_RECORD_BATCH_SIZE = getattr(settings, "DJANGO_CHANGESET_BATCH_SIZE", 500)
+
+# content types of the tracked models, keyed by model class
+_content_type_cache = {}
+
+
+def get_content_type_for_model(model_class):
+    """
+    Gets the ContentType object of the given model class. The content type is cached per model class, so the
+    lookup only goes through the ContentType manager once per model.
+    :param model_class: the model class
+    :returns: the ContentType object of the model
+    :rtype: django.contrib.contenttypes.models.ContentType
+    """
+    try:
+        return _content_type_cache[model_class]
+    except KeyError:
+        content_type = ContentType.objects.get_for_model(model_class)
+        _content_type_cache[model_class] = content_type
+        return content_type
+
+
+def get_content_type_for_instance(instance):
+    """
+    Gets the (cached) ContentType object of the given model instance
+    :param instance: the model instance
+    :returns: the ContentType object of the instance's model
+    :rtype: django.contrib.contenttypes.models.ContentType
+    """
+    return get_content_type_for_model(instance.__class__)
+
+
+def clear_content_type_cache(**kwargs):
+    """
+    Clears the content type cache (e.g., after migrations, as content types might have been re-created)
+    """
+    _content_type_cache.clear()
+
+
+def _tuple_attrgetter(names):
+    """
+    Returns a callable which gets all the given attributes of an object as a tuple (unlike operator.attrgetter, this
+    also returns a tuple for less than two attributes)
+    :param names: the attribute names
+    :return: callable
+    """
+    if len(names) > 1:
+        return attrgetter(*names)
+    elif names:
+        getter = attrgetter(names[0])
+        return lambda obj: (getter(obj), )
+
+    return lambda obj: ()
+
+
+# tracking options of the tracked models (see the Meta attributes below), keyed by model class
+TrackingOptions = namedtuple('TrackingOptions', [
+    'track_fields', 'track_by', 'track_related', 'track_related_query_names', 'track_related_many',
+    'attribute_fields', 'attribute_names', 'attribute_getter', 'many_to_many_fields', 'version_field',
+    'tracked_names', 'object_key_name', 'track_through', 'track_soft_delete_by', 'aggregate_changesets_within',
+    'track_m2m_on_post_init',
+])
+_tracking_options_cache = {}
+
+# a relation tracked with track_related_many
+TrackedRelation = namedtuple('TrackedRelation', ['name', 'track_fields', 'is_relation', 'model_label', 'row_fields'])
+
+
+class RelatedRows(tuple):
+    """
+    The rows (primary key and tracked fields) of the objects of a relation tracked with track_related_many. The rows
+    are compared to detect changes, and are only serialized (in the format of Django's JSON serializer) when they are
+    stored in a change record.
+    """
+
+    def __new__(cls, rows, model_label, field_names):
+        related_rows = super(RelatedRows, cls).__new__(cls, rows)
+        related_rows.model_label = model_label
+        related_rows.field_names = field_names
+        return related_rows
+
+    def __reduce__(self):
+        # the rows are part of the original data of an instance, which might get pickled or copied
+        return self.__class__, (tuple(self), self.model_label, self.field_names)
+
+    def serialize(self):
+        return json.dumps([
+            {'model': self.model_label, 'pk': row[0], 'fields': dict(zip(self.field_names, row[1:]))}
+            for row in self
+        ], cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def get_tracking_options(instance):
+    """
+    Gets the tracking options defined in the Meta class of the given model instance. The options are resolved once
+    per model class.
+    :param instance: the model instance
+    :returns: the tracking options of the instance's model
+    :rtype: TrackingOptions
+    """
+    model_class = instance.__class__
+
+    try:
+        return _tracking_options_cache[model_class]
+    except KeyError:
+        pass
+
+    track_related = getattr(instance._meta, 'track_related', [])  # get meta class attribute 'track_related'
+
+    if isinstance(track_related, dict):
+        logger.error('You are using track_related with a dictionary, but this version is expecting a list!')
+
+    track_fields = tuple(getattr(instance._meta, 'track_fields', ()))
+
+    # split the tracked fields into fields that are read from an attribute of the instance (the attname, which is the
+    # id for foreign keys --> not a db lookup), and many to many fields which need to be fetched using the manager
+    attribute_fields = []
+    attribute_names = []
+    many_to_many_fields = []
+
+    for field_name in track_fields:
+        field = instance._meta.get_field(field_name)
+
+        if hasattr(field, 'remote_field') and isinstance(field.remote_field, ManyToManyRel):
+            many_to_many_fields.append(field_name)
+        else:
+            attribute_fields.append(field_name)
+            attribute_names.append(field.attname)
+
+    # only relations can be tracked with track_related_many
+    track_related_many = []
+
+    for relation_field_name, relation_track_fields in getattr(instance._meta, 'track_related_many', ()):
+        field = instance._meta.get_field(relation_field_name)
+
+        if (hasattr(field, 'remote_field') and field.remote_field) or \
+                (hasattr(field, 'field') and field.field.remote_field):
+            related_meta = field.related_model._meta
+            row_fields = None
+
+            # the tracked fields are read as rows (in the order of Django's serializer), unless they contain many to
+            # many fields
+            if not any(related_field.name in relation_track_fields for related_field in related_meta.many_to_many):
+                row_fields = tuple(
+                    related_field.name for related_field in related_meta.concrete_model._meta.local_fields
+                    if related_field.serialize and related_field.name in relation_track_fields
+                )
+
+            track_related_many.append(TrackedRelation(
+                relation_field_name, relation_track_fields, True, related_meta.label_lower, row_fields
+            ))
+        else:
+            logger.error("track_related_many field '%s' is not a relation", relation_field_name)
+            track_related_many.append(TrackedRelation(relation_field_name, relation_track_fields, False, None, None))
+
+    track_by = getattr(instance._meta, 'track_by', 'id')
+
+    tracking_options = TrackingOptions(
+        track_fields=track_fields,
+        track_by=track_by,
+        track_related=tuple(track_related),
+        # the "related_name" of each foreign key tracked with track_related
+        track_related_query_names=tuple(
+            instance._meta.get_field(fk_field_name).related_query_name() for fk_field_name in track_related
+        ),
+        track_related_many=tuple(track_related_many),
+        attribute_fields=tuple(attribute_fields),
+        attribute_names=tuple(attribute_names),
+        attribute_getter=_tuple_attrgetter(attribute_names),
+        many_to_many_fields=tuple(many_to_many_fields),
+        version_field=next(
+            (field for field in instance._meta.fields if isinstance(field, ChangesetVersionField)),
+            None
+        ),
+        tracked_names=frozenset(track_fields) | frozenset(relation.name for relation in track_related_many),
+        # the changeset field which references the instance (object_uuid for uuid fields, object_id otherwise)
+        object_key_name=(
+            'object_uuid' if isinstance(instance._meta.get_field(track_by), models.UUIDField) else 'object_id'
+        ),
+        track_through=tuple(getattr(instance._meta, 'track_through', ())),
+        track_soft_delete_by=getattr(instance._meta, 'track_soft_delete_by', None),
+        aggregate_changesets_within=timezone.timedelta(
+            seconds=getattr(instance._meta, 'aggregate_changesets_within_seconds', 0)
+        ),
+        track_m2m_on_post_init=getattr(instance._meta, 'track_m2m_on_post_init', True),
+    )
+    _tracking_options_cache[model_class] = tracking_options
+
+    return tracking_options
+
+
+def get_update_field_names(instance, update_fields):
+    """
+    Gets the names of the fields saved with the given update_fields, which may also contain attnames (e.g., 'parent_id'
+    for the foreign key 'parent')
+    :param instance: the model instance
+    :param update_fields: the update_fields of the save (None if all fields are saved)
+    :return: the names of the saved fields (None if all fields are saved)
+    """
+    if update_fields is None:
+        return None
+
+    return frozenset(instance._meta.get_field(field_name).name for field_name in update_fields)
+
+
+def is_tracked_save(instance, update_fields):
+    """
+    Checks whether a save of the given instance can have changed any tracked field
+    :param instance: the model instance
+    :param update_fields: the update_fields of the save (None if all fields are saved)
+    :return: False if only fields were saved that are neither in track_fields nor in track_related_many
+    """
+    if update_fields is None:
+        return True
+
+    return not get_tracking_options(instance).tracked_names.isdisjoint(get_update_field_names(instance, update_fields))
+
+
+class RevisionBatch(object):
+    """
+    Collects changesets and change records while revisions are batched (see RevisionModelMixin.batched_revisions),
+    and inserts them with bulk creates when the batch is saved. If changes are aggregated, the changes of several saves
+    of the same object are merged into a single changeset.
+    """
+
+    def __init__(self, aggregate=False):
+        self.aggregate = aggregate
+        self.change_sets = []
+        self.change_records = []
+        self.object_keys = set()
+        # latest changeset and change records (by field name) of each object, used to aggregate changes
+        self.latest_change_sets = {}
+        self.change_records_by_field = {}
+        self.obsolete_change_records = set()
+        # instances referencing a batched changeset of many to many changes (see m2m_changed)
+        self.m2m_instances = []
+
+    @staticmethod
+    def get_object_key(object_type, object_id, object_uuid):
+        return object_type.pk, object_id, object_uuid
+
+    def add_change_set(self, change_set, aggregatable=False):
+        object_key = self.get_object_key(change_set.object_type, change_set.object_id, change_set.object_uuid)
+
+        self.change_sets.append(change_set)
+        self.object_keys.add(object_key)
+
+        if self.aggregate:
+            # only the changes of later saves can be merged into the changeset of a save (not of m2m or related changes)
+            self.latest_change_sets[object_key] = change_set if aggregatable else None
+
+    def add_m2m_instance(self, instance):
+        self.m2m_instances.append(instance)
+
+    def add_change_records(self, change_records):
+        self.change_records.extend(change_records)
+
+        if self.aggregate:
+            for change_record in change_records:
+                self.change_records_by_field[change_record.change_set.pk, change_record.field_name] = change_record
+
+    def has_change_set(self, object_type, object_id=None, object_uuid=None):
+        """ checks whether a changeset for the given object has been collected by this batch """
+        return self.get_object_key(object_type, object_id, object_uuid) in self.object_keys
+
+    def aggregate_changes(self, change_set, changed_fields):
+        """
+        Merges the changed fields of an update into the latest changeset (insert or update) of the same object
+        collected by this batch, if changes are aggregated
+        :param change_set: the (unsaved) changeset
+        :param changed_fields: a dictionary with the field name as key, and the original and new value as content
+        :return: True if the changes have been merged, False if the changeset needs to be added
+        """
+        if not self.aggregate or change_set.changeset_type != ChangeSet.UPDATE_TYPE:
+            return False
+
+        latest_change_set = self.latest_change_sets.get(
+            self.get_object_key(change_set.object_type, change_set.object_id, change_set.object_uuid)
+        )
+
+        if latest_change_set is None \
+                or latest_change_set.changeset_type not in (ChangeSet.INSERT_TYPE, ChangeSet.UPDATE_TYPE):
+            return False
+
+        new_change_records = []
+
+        for changed_field, changed_value in changed_fields.items():
+            new_value = get_change_record_value(changed_value[1])
+            change_record = self.change_records_by_field.get((latest_change_set.pk, changed_field))
+
+            if change_record is None or id(change_record) in self.obsolete_change_records:
+                change_record = ChangeRecord(
+                    change_set=latest_change_set, field_name=changed_field,
+                    old_value=get_change_record_value(changed_value[0]),
+                    new_value=new_value
+                )
+                new_change_records.append(change_record)
+            else:
+                change_record.new_value = new_value
+
+            # a field of an update which has been changed back to its old value does not need a change record
+            if latest_change_set.changeset_type == ChangeSet.UPDATE_TYPE \
+                    and ChangeRecord._meta.get_field('new_value').to_python(new_value) == \
+                    ChangeRecord._meta.get_field('old_value').to_python(change_record.old_value):
+                self.obsolete_change_records.add(id(change_record))
+            else:
+                self.obsolete_change_records.discard(id(change_record))
+
+        self.add_change_records(new_change_records)
+
+        return True
+
+    def discard(self):
+        # the batched changesets are never saved, so instances must not reference them any longer
+        for instance in self.m2m_instances:
+            instance.__dict__.pop('__m2m_change_set__', None)
+
+    def save(self):
+        change_sets = self.change_sets
+        change_records = self.change_records
+
+        if self.obsolete_change_records:
+            change_records = [
+                change_record for change_record in change_records
+                if id(change_record) not in self.obsolete_change_records
+            ]
+
+            # aggregated updates without any remaining change record are not saved
+            change_set_ids = {change_record.change_set.pk for change_record in change_records}
+            change_sets = [
+                change_set for change_set in change_sets
+                if change_set.pk in change_set_ids or change_set.changeset_type != ChangeSet.UPDATE_TYPE
+            ]
+
+        # change sets need to be inserted first, as the change records reference them
+        ChangeSet.objects.bulk_create(change_sets, batch_size=CHANGE_RECORD_BATCH_SIZE)
+        ChangeRecord.objects.bulk_create(change_records, batch_size=CHANGE_RECORD_BATCH_SIZE)
+
+
+def get_revision_batch():
+    """
+    Gets the revision batch of the current thread or task
+    :returns: the current revision batch, or None if revisions are not batched
+    :rtype: RevisionBatch
+    """
+    return _revision_batch.get()
+
+
+def get_change_record_value(value):
+    """
+    Gets the value to store in a change record for the given tracked value (the ids of many to many fields are stored
+    as a comma separated list, the rows of related fields with many relationship as JSON)
+    :param value: the tracked value
+    :return: the value of the change record
+    """
+    if isinstance(value, frozenset):
+        return ",".join([str(item) for item in sorted(value)])
+    elif isinstance(value, RelatedRows):
+        return value.serialize()
+
+    return value
+
+
+def save_change_set(change_set, aggregatable=False):
+    """
+    Saves the given changeset, or adds it to the current revision batch
+    :param change_set: the changeset
+    :param aggregatable: whether the changes of later saves of the object can be merged into this changeset (if the
+        current revision batch aggregates changes)
+    """
+    revision_batch = get_revision_batch()
+
+    if revision_batch is None:
+        change_set.save()
+    else:
+        revision_batch.add_change_set(change_set, aggregatable)
+
+
+def save_change_sets(change_sets):
+    """
+    Bulk creates the given changesets, or adds them to the current revision batch
+    :param change_sets: list of changesets
+    """
+    revision_batch = get_revision_batch()
+
+    if revision_batch is None:
+        ChangeSet.objects.bulk_create(change_sets, batch_size=CHANGE_RECORD_BATCH_SIZE)
+    else:
+        for change_set in change_sets:
+            revision_batch.add_change_set(change_set)
+
+
+def save_change_records(change_records):
+    """
+    Bulk creates the given change records, or adds them to the current revision batch
+    :param change_records: list of change records
+    """
+    revision_batch = get_revision_batch()
+
+    if revision_batch is None:
+        ChangeRecord.objects.bulk_create(change_records, batch_size=CHANGE_RECORD_BATCH_SIZE)
+    else:
+        revision_batch.add_change_records(change_records)
+
+
+def has_batched_change_set(object_type, object_id=None, object_uuid=None):
+    """
+    Checks whether a changeset for the given object is waiting in the current revision batch
+    :returns: True if there is a batched changeset for the object
+    :rtype: bool
+    """
+    revision_batch = get_revision_batch()
+
+    return revision_batch is not None and revision_batch.has_change_set(object_type, object_id, object_uuid)
+
 
 # allow the `track_fields`, `track_by` and `track_related` attributes in the Meta class of
 # models. `track_fields` should contain a list of field names for
@@ -44,7 +508,7 @@ _thread_locals = local()
 options.DEFAULT_NAMES = options.DEFAULT_NAMES + \
                         ('track_fields', 'track_by', 'track_related', 'track_through',
                          'track_soft_delete_by', 'track_related_many',
-                         'aggregate_changesets_within_seconds')
+                         'aggregate_changesets_within_seconds', 'track_m2m_on_post_init')
 
 
 class ChangesetVersionField(models.PositiveIntegerField):
@@ -123,16 +587,14 @@ class RevisionModelMixin(object):
     model """
 
     def get_version_field(self):
-        """ gets the version field by looking in _meta.fields, and checks if it is a ChangesetVersionField """
-        for field in self._meta.fields:
-            if isinstance(field, ChangesetVersionField):
-                return field
-        return None
+        """ gets the version field (the first ChangesetVersionField in _meta.fields, looked up once per model) """
+        return get_tracking_options(self).version_field
 
     def update_version_number(self, content_type):
         """
-        Check if version number is the same, and update it
-        :param content_type:
+        Check if version number is the same, and update it. The version number is compared and incremented with a
+        single conditional UPDATE, so concurrent updates can not both succeed.
+        :param content_type: the content type of this instance (not needed anymore, kept for compatibility)
         :return:
         """
         version_field = self.get_version_field()
@@ -141,12 +603,18 @@ class RevisionModelMixin(object):
             # version field not available
             return
 
-        orig_data = content_type.get_object_for_this_type(pk=self.pk)
-
-        old_version = version_field.value_from_object(orig_data)
         new_version = version_field.value_from_object(self)
 
-        if old_version != new_version:
+        updated = self.__class__._base_manager.filter(
+            pk=self.pk, **{version_field.attname: new_version}
+        ).update(**{version_field.attname: new_version + 1})
+
+        if not updated:
+            # the version number has been changed in the meantime, fetch the current data for the exception (only in
+            # this case the whole row is needed)
+            orig_data = self.__class__._base_manager.get(pk=self.pk)
+            old_version = version_field.value_from_object(orig_data)
+
             raise ConcurrentUpdateException(orig_data=orig_data, latest_version_number=old_version)
 
         setattr(self, version_field.attname, new_version + 1)
@@ -164,65 +632,310 @@ Make sure that your model has a field named "changesets" that looks like this:
         changesets = ChangeSetRelation()
 """)
 
+    @classmethod
+    def prefetch_changesets(cls, queryset):
+        """
+        Prefetches the changesets (and their users) of all objects in the given queryset, so accessing cs_created_by,
+        cs_created_at, cs_last_modified_by and cs_last_modified_at does not query the database per object.
+
+        Example: MyModel.prefetch_changesets(MyModel.objects.all())
+
+        :param queryset: a queryset of this model
+        :returns: the queryset with the changesets prefetched
+        :rtype: django.db.models.QuerySet
+        """
+        return queryset.prefetch_related(
+            Prefetch('changesets', queryset=ChangeSet.objects.select_related('user').order_by('-date'))
+        )
+
+    def _get_prefetched_changesets(self):
+        """ gets the prefetched changesets (newest first), or None if they have not been prefetched """
+        if 'changesets' not in getattr(self, '_prefetched_objects_cache', {}):
+            return None
+
+        return list(self.changesets.all())
+
+    def _load_boundary_changesets(self):
+        """
+        gets the insert and the latest changeset (from the prefetched changesets, or with a single query), and caches
+        them on the instance
+        """
+        self.check_for_changesets_attribute()
+        changesets = self._get_prefetched_changesets()
+
+        if changesets is None:
+            latest_changeset = self.changesets.order_by('-date').values('pk')[:1]
+            # only load the columns read by the cs_* properties, and the relations joined by the ChangeSet manager
+            changesets = list(self.changesets.filter(
+                Q(changeset_type=ChangeSet.INSERT_TYPE) | Q(pk=Subquery(latest_changeset))
+            ).only(
+                'changeset_type', 'date', 'user',
+                *[related_object.split('__')[0] for related_object in changeset_related_object]
+            ).order_by('-date'))
+
+        self.__dict__['_insert_changeset'] = next(
+            (change_set for change_set in changesets if change_set.changeset_type == ChangeSet.INSERT_TYPE),
+            None
+        )
+        self.__dict__['_latest_changeset'] = changesets[0] if changesets else None
+
+    def _get_insert_changeset(self):
+        """ gets the changeset of the insert """
+        if '_insert_changeset' not in self.__dict__:
+            self._load_boundary_changesets()
+
+        return self.__dict__['_insert_changeset']
+
+    def _get_latest_changeset(self):
+        """ gets the latest changeset """
+        if '_latest_changeset' not in self.__dict__:
+            self._load_boundary_changesets()
+
+        return self.__dict__['_latest_changeset']
+
+    def _clear_changeset_cache(self):
+        """ forgets about cached and prefetched changesets (e.g., after a new changeset has been saved) """
+        self.__dict__.pop('_insert_changeset', None)
+        self.__dict__.pop('_latest_changeset', None)
+        getattr(self, '_prefetched_objects_cache', {}).pop('changesets', None)
+
     @property
     def cs_created_by(self):
-        self.check_for_changesets_attribute()
-        return self.changesets.filter(changeset_type='I').first().user
+        return self._get_insert_changeset().user
 
     @property
     def cs_created_at(self):
-        self.check_for_changesets_attribute()
-        return self.changesets.filter(changeset_type='I').first().date
+        return self._get_insert_changeset().date
 
     @property
     def cs_last_modified_by(self):
-        self.check_for_changesets_attribute()
-        return self.changesets.last().user
+        return self._get_latest_changeset().user
 
     @property
     def cs_last_modified_at(self):
-        self.check_for_changesets_attribute()
-        return self.changesets.last().date
+        return self._get_latest_changeset().date
 
     @staticmethod
     def set_enabled(state):
-        setattr(_thread_locals, '__django_changeset__is_enabled', state)
+        _is_enabled.set(state)
 
     @staticmethod
     def get_enabled():
-        return getattr(_thread_locals, '__django_changeset__is_enabled', True)
+        return _is_enabled.get()
 
     @staticmethod
     def set_related_enabled(state):
-        setattr(_thread_locals, '__django_changeset__is_related_enabled', state)
+        _is_related_enabled.set(state)
 
     @staticmethod
     def get_related_enabled():
-        return getattr(_thread_locals, '__django_changeset__is_related_enabled', True)
+        return _is_related_enabled.get()
 
     @staticmethod
-    @contextmanager
     def enabled(state):
-        state_orig = RevisionModelMixin.get_enabled()
-        if state == state_orig:
-            yield
-            return
+        return ContextVarState(_is_enabled, state)
 
-        RevisionModelMixin.set_enabled(state)
-        yield
-        RevisionModelMixin.set_enabled(state_orig)
+    @staticmethod
+    def related_enabled(state):
+        return ContextVarState(_is_related_enabled, state)
+
+    @staticmethod
+    def bulk_load():
+        """
+        Objects loaded within this context do not store their original data (no work, and no queries for many to many
+        and related many fields, per loaded object). Use it to iterate over objects which are only read: if such an
+        object is saved, its original data has to be loaded from the database first.
+        """
+        return ContextVarState(_is_original_data_enabled, False)
+
+    def _get_original_data(self):
+        """ Gets the values of all tracked fields and relations, which are stored as the original data of this instance
+
+        :returns: a dictionary with the field (or relation) name as key, and the value as content
+        :rtype: dict
+        """
+        if get_tracking_options(self).track_m2m_on_post_init:
+            original_data = self._get_tracked_field_values()
+        else:
+            # the original ids of many to many fields are fetched before they are changed (see m2m_changed)
+            original_data = self._get_tracked_field_values(many_to_many_fields=())
+
+        original_data.update(self._get_tracked_related_many_values())
+
+        return original_data
+
+    def _get_tracked_field_values(self, many_to_many_fields=None):
+        """ Gets the current values of all fields in track_fields
+
+        :param many_to_many_fields: if given, only the values of these many to many fields (instead of all tracked many
+            to many fields) are fetched
+        :returns: a dictionary with the field name as key, and the value (the id for foreign keys, a frozenset of
+            ids for many to many fields) as content
+        :rtype: dict
+        """
+        tracking_options = get_tracking_options(self)
+
+        try:
+            # get the values of all plain and foreign key fields at once
+            values = dict(zip(
+                tracking_options.attribute_fields,
+                tracking_options.attribute_getter(self)
+            ))
+        except (ObjectDoesNotExist, ValueError):
+            # fall back to getting the values field by field
+            values = {}
+
+            for field_name, attribute_name in zip(tracking_options.attribute_fields, tracking_options.attribute_names):
+                try:
+                    value = getattr(self, attribute_name)
+                except (ObjectDoesNotExist, ValueError):
+                    value = None
+
+                values[field_name] = value
+
+        if many_to_many_fields is None:
+            many_to_many_fields = tracking_options.many_to_many_fields
+
+        values.update(self._get_tracked_many_to_many_values(many_to_many_fields))
+
+        return values
+
+    def _get_tracked_many_to_many_values(self, many_to_many_fields):
+        """ Gets the current ids of the given many to many fields
+
+        :param many_to_many_fields: the names of the many to many fields
+        :returns: a dictionary with the field name as key, and a frozenset of the ids as content
+        :rtype: dict
+        """
+        values = {}
+        prefetched_objects = getattr(self, '_prefetched_objects_cache', {})
+        queried_fields = []
+
+        for field_name in many_to_many_fields:
+            if field_name in prefetched_objects:
+                # the related objects have been fetched with prefetch_related, no need to query them again (this does
+                # not apply to post_init, the prefetched objects are only assigned once all objects have been loaded)
+                values[field_name] = frozenset(related_object.pk for related_object in prefetched_objects[field_name])
+            else:
+                queried_fields.append(field_name)
+
+        if len(queried_fields) > 1:
+            try:
+                # fetch the ids of all many to many fields with a single query
+                values.update(self._query_many_to_many_values(queried_fields))
+                return values
+            except (ObjectDoesNotExist, ValueError):
+                # fall back to fetching the ids field by field
+                pass
+
+        # iterate over all many to many fields that need to be tracked
+        for field_name in queried_fields:
+            try:
+                # many to many related fields are special, we need to fetch the IDs using the manager (they are
+                # compared as a set, so the order of the IDs does not matter --> no need to sort them in the database)
+                value = frozenset(getattr(self, field_name).order_by().values_list('pk', flat=True))
+            except (ObjectDoesNotExist, ValueError):
+                value = None
+
+            values[field_name] = value
+
+        return values
+
+    def _query_many_to_many_values(self, many_to_many_fields):
+        """ Fetches the ids of the given many to many fields with a single query (a union of the related objects of all
+        fields, the ids are fetched as text, as the primary keys of the related models can be of different types)
+
+        :param many_to_many_fields: the names of the many to many fields
+        :returns: a dictionary with the field name as key, and a frozenset of the ids as content
+        :rtype: dict
+        """
+        querysets = [
+            getattr(self, field_name).order_by().values_list(
+                Value(field_name, output_field=models.CharField()), Cast('pk', output_field=models.CharField())
+            )
+            for field_name in many_to_many_fields
+        ]
+
+        ids = {field_name: [] for field_name in many_to_many_fields}
+
+        for field_name, related_pk in querysets[0].union(*querysets[1:], all=True):
+            ids[field_name].append(related_pk)
+
+        values = {}
+
+        for field_name, related_pks in ids.items():
+            # convert the ids to the type of the primary key of the related model
+            to_python = self._meta.get_field(field_name).related_model._meta.pk.to_python
+            values[field_name] = frozenset(to_python(related_pk) for related_pk in related_pks)
+
+        return values
+
+    def _get_tracked_related_many_values(self):
+        """ Gets the current values of all relations in track_related_many
+
+        :returns: a dictionary with the relation name as key, and the rows (or the serialized tracked fields) of the
+            related objects as content
+        :rtype: dict
+        """
+        values = {}
+
+        # iterate over all related fields with many relationship that need to be tracked in detail
+        for relation in get_tracking_options(self).track_related_many:
+            value = None
+
+            if relation.is_relation:
+                try:
+                    queryset = getattr_orm(self, relation.name).filter()
+
+                    if relation.row_fields is not None:
+                        # read the rows without creating model instances, they are serialized when they are stored
+                        value = RelatedRows(
+                            queryset.order_by('pk').values_list('pk', *relation.row_fields),
+                            relation.model_label,
+                            relation.row_fields
+                        )
+                    else:
+                        value = serializers.serialize('json', queryset, fields=relation.track_fields)
+                except (ObjectDoesNotExist, ValueError):
+                    pass
+
+            values[relation.name] = value
+
+        return values
 
     @staticmethod
     @contextmanager
-    def related_enabled(state):
-        state_orig = RevisionModelMixin.get_related_enabled()
-        if state == state_orig:
+    def batched_revisions(aggregate=False):
+        """
+        Batches the revisions of all saves within this context. Instead of inserting the changesets and change records
+        of every save, they are collected and inserted with a few bulk creates when the context is left (e.g., for
+        imports saving many objects). As the batched changesets are not visible in the database before, changesets are
+        not aggregated (see aggregate_changesets_within_seconds) within this context. The saves within this context and
+        their revisions are committed in a single transaction, if the context is left with an exception, both are rolled
+        back.
+
+        :param aggregate: if True, the changes of several saves of the same object within this context are merged into
+            a single changeset (the change records keep the first old value and the last new value)
+        """
+        if get_revision_batch() is not None:
+            # already batching revisions, the outer context saves them
             yield
             return
 
-        RevisionModelMixin.set_related_enabled(state)
-        yield
-        RevisionModelMixin.set_related_enabled(state_orig)
+        revision_batch = RevisionBatch(aggregate=aggregate)
+        token = _revision_batch.set(revision_batch)
+
+        try:
+            with transaction.atomic(using=router.db_for_write(ChangeSet)):
+                try:
+                    yield
+                finally:
+                    _revision_batch.reset(token)
+
+                revision_batch.save()
+        except BaseException:
+            revision_batch.discard()
+            raise
 
     @property
     def changed_data(self):
@@ -231,247 +944,249 @@ Make sure that your model has a field named "changesets" that looks like this:
         :returns: a dictionary with the affected field name as key, and the original and new value as content
         :rtype: dict
         """
+        return self.get_changed_data()
+
+    def _get_tracked_many_values(self):
+        """ Gets the current values of the tracked many to many fields and of all relations in track_related_many
+
+        :returns: a dictionary with the field or relation name as key, and the value as content
+        :rtype: dict
+        """
+        tracking_options = get_tracking_options(self)
+
+        if tracking_options.track_m2m_on_post_init:
+            many_to_many_fields = tracking_options.many_to_many_fields
+        else:
+            # the original ids of many to many fields are only known if they have been changed (see m2m_changed),
+            # otherwise they are the same as the current ids
+            orig_data = getattr(self, '__original_data__', {})
+            many_to_many_fields = [
+                field_name for field_name in tracking_options.many_to_many_fields if field_name in orig_data
+            ]
+
+        values = self._get_tracked_many_to_many_values(many_to_many_fields)
+        values.update(self._get_tracked_related_many_values())
+
+        return values
+
+    def get_changed_data(self, update_fields=None, many_values=None):
+        """ Gets a dictionary of changed data
+
+        :param update_fields: if given, only these fields (and many to many fields, which are not saved with the
+            model) of track_fields are compared, as no other field can have been changed by the save
+        :param many_values: the current values of the many to many fields and related many fields, if they are already
+            known (see _get_tracked_many_values)
+        :returns: a dictionary with the affected field name as key, and the original and new value as content
+        :rtype: dict
+        """
+        tracking_options = get_tracking_options(self)
         changed_fields = {}
         orig_data = getattr(self, '__original_data__', {})
+        update_fields = get_update_field_names(self, update_fields)
+
+        if many_values is None:
+            many_values = self._get_tracked_many_values()
+
+        current_data = self._get_tracked_field_values(many_to_many_fields=())
+        current_data.update(many_values)
 
         # compare all fields in track_fields
-        for field_name in getattr(self._meta, 'track_fields', []):
-            orig_value = orig_data.get(field_name)
+        for field_name in tracking_options.track_fields:
+            # skip fields that have not been saved
+            if update_fields is not None and field_name not in update_fields \
+                    and field_name not in tracking_options.many_to_many_fields:
+                continue
 
-            try:
-                # check if is foreign key --> if yes, only get the id (--> not a db lookup)
-                field = self._meta.get_field(field_name)
-
-                if hasattr(field, 'remote_field') and field.remote_field:
-                    # related field, get the id
-                    if isinstance(field.remote_field, ManyToManyRel):
-                        # many to many related fields are special, we need to fetch the IDs using the manager
-                        new_value = ",".join(
-                            [str(item) for item in getattr(self, field_name).all().values_list('id', flat=True)])
-                    else:
-                        new_value = getattr(self, field_name + "_id")
-                else:
-                    new_value = getattr(self, field_name)
-            except ObjectDoesNotExist:
-                new_value = None
+            # skip many to many fields which have not been changed
+            if field_name not in current_data:
+                continue
+
+            orig_value = orig_data.get(field_name)
+            new_value = current_data[field_name]
 
             # check if value has changed, and store it in changed_fields
             if orig_value != new_value:
                 changed_fields[field_name] = (orig_value, new_value)
 
-        # iterate over all related fields with many relationship that need to be tracked in detail
-        for relation_entry in getattr(self._meta, 'track_related_many', ()):
-            relation_field_name = relation_entry[0]
-            relation_track_fields = relation_entry[1]
-
-            orig_value = orig_data.get(relation_field_name)
-
-            try:
-                # get field
-                field = self._meta.get_field(relation_field_name)
-
-                if (hasattr(field, 'remote_field') and field.remote_field) or (hasattr(field, 'field') and field.field.remote_field):
-                    new_value = serializers.serialize(
-                        'json',
-                        getattr_orm(self, relation_field_name).filter(),
-                        fields=relation_track_fields
-                    )
-                else:
-                    logger.error("track_related_many field '{}' is not a relation".format(relation_field_name))
-                    new_value = None
-
-            except (ObjectDoesNotExist, ValueError):
-                new_value = None
+        # compare all related fields with many relationship that need to be tracked in detail
+        for relation in tracking_options.track_related_many:
+            orig_value = orig_data.get(relation.name)
+            new_value = current_data[relation.name]
 
             # check if value has changed, and store it in changed_fields
             if orig_value != new_value:
-                changed_fields[relation_field_name] = (orig_value, new_value)
+                changed_fields[relation.name] = (orig_value, new_value)
 
         return changed_fields
 
-    def _persist_related_change(self, related_name, related_uuid):
+    def _get_changeset_object_filter(self):
         """
-        Persists a change of an entity referencing this entity. This method
-        should be called on the 'parent entity' when saving a 'child entity'
-        which should be represented in the 'parent entity' history.
-
-        :param related_name: Name of the related field on the parent entity
-        :param object_uuid: UUID of the child entity
+        Gets the changeset field (object_uuid or object_id, depending on the field in track_by) and value referencing
+        this instance
+        :returns: a dictionary which can be used to filter or create changesets of this instance
+        :rtype: dict
         """
-        object_uuid_field_name = getattr(self._meta, 'track_by', 'id')
-        object_uuid_field = self._meta.get_field(object_uuid_field_name)
-        object_uuid = getattr(self, object_uuid_field_name)
-        object_type = ContentType.objects.get_for_model(self)
+        tracking_options = get_tracking_options(self)
 
-        change_set = ChangeSet()
-        change_set.object_type = object_type
+        return {tracking_options.object_key_name: getattr_orm(self, tracking_options.track_by)}
 
-        if isinstance(object_uuid_field, models.UUIDField):
-            change_set.object_uuid = object_uuid
-            existing_changesets = ChangeSet.objects.filter(object_uuid=object_uuid, object_type=object_type)
+    def _get_related_change(self, related_name, related_uuid):
+        """
+        Gets the changeset and change record of a change of an entity
+        referencing this entity. This method should be called on the 'parent
+        entity' when saving a 'child entity' which should be represented in
+        the 'parent entity' history.
 
-        else:
-            change_set.object_id = object_uuid
-            existing_changesets = ChangeSet.objects.filter(object_id=object_uuid, object_type=object_type)
+        The changeset type is determined by save_related_revision, which checks the existing changesets of all related
+        entities at once.
 
-        # are there any existing changesets?
-        if existing_changesets.exists():
-            change_set.changeset_type = change_set.UPDATE_TYPE
+        :param related_name: Name of the related field on the parent entity
+        :param object_uuid: UUID of the child entity
+        :returns: the (unsaved) changeset and change record of the related change
+        :rtype: tuple
+        """
+        change_set = ChangeSet(object_type=get_content_type_for_instance(self), **self._get_changeset_object_filter())
 
-        change_set.save()
+        change_record = ChangeRecord(
+            change_set=change_set, field_name=related_name,
+            new_value=related_uuid, is_related=True
+        )
 
-        change_record = ChangeRecord()
-        change_record.change_set = change_set
-        change_record.field_name = related_name
-        change_record.new_value = related_uuid
-        change_record.is_related = True
-        change_record.save()
+        return change_set, change_record
 
     @staticmethod
     def save_related_revision(sender, **kwargs):
-        if not RevisionModelMixin.get_enabled() or not RevisionModelMixin.get_related_enabled():
+        if not _is_enabled.get() or not _is_related_enabled.get():
             return
 
         new_instance = kwargs['instance']
 
-        object_uuid_field_name = getattr(new_instance._meta, 'track_by', 'id')
-        object_related = getattr(new_instance._meta, 'track_related', [])  # get meta class attribute 'track_related'
+        tracking_options = get_tracking_options(new_instance)
+        object_related = zip(tracking_options.track_related, tracking_options.track_related_query_names)
 
-        if isinstance(object_related, dict):
-            logger.error('You are using track_related with a dictionary, but this version is expecting a list!')
+        object_uuid = getattr_orm(new_instance, tracking_options.track_by)
 
-        object_uuid = getattr_orm(new_instance, object_uuid_field_name)
+        # collect changesets (one per related object) and change records of all related objects
+        change_sets = {}
+        change_records = []
 
         # iterate over the list of "track_related" items and get their related object and name
-        for fk_field_name in object_related:
+        for fk_field_name, related_name in object_related:
             try:
                 related_object = getattr_orm(new_instance, fk_field_name)
 
                 if not isinstance(related_object, RevisionModelMixin):
                     raise ObjectDoesNotExist
 
-                # get the related field and the "related_name" (as in: ForeignKey(MyModel, related_name="abcd")
-                related_field = new_instance._meta.get_field(fk_field_name)
-                related_name = related_field.related_query_name()
+                change_set, change_record = related_object._get_related_change(related_name, object_uuid)
+                object_key = RevisionBatch.get_object_key(
+                    change_set.object_type, change_set.object_id, change_set.object_uuid
+                )
+
+                if object_key in change_sets:
+                    # another relation to the same object, use the same changeset
+                    change_record.change_set = change_sets[object_key]
+                else:
+                    change_sets[object_key] = change_set
 
-                related_object._persist_related_change(related_name, object_uuid)
+                change_records.append(change_record)
+                related_object._clear_changeset_cache()
             except ObjectDoesNotExist:
                 pass
 
+        if not change_sets:
+            return
+
+        # are there any existing changesets of the related objects? (checked for all of them with a single query)
+        existing_object_keys = set(ChangeSet.objects.filter(reduce(or_, [
+            Q(object_type=change_set.object_type, object_id=change_set.object_id, object_uuid=change_set.object_uuid)
+            for change_set in change_sets.values()
+        ])).order_by().values_list('object_type_id', 'object_id', 'object_uuid').distinct())
+
+        for object_key, change_set in change_sets.items():
+            if object_key in existing_object_keys or has_batched_change_set(
+                    change_set.object_type, change_set.object_id, change_set.object_uuid):
+                change_set.changeset_type = change_set.UPDATE_TYPE
+
+        # bulk create changesets and change records
+        save_change_sets(list(change_sets.values()))
+        save_change_records(change_records)
+
     @staticmethod
     def save_initial_model_revision(sender, **kwargs):
-        if not RevisionModelMixin.get_enabled():
+        if not _is_enabled.get():
             return
 
         # do not track raw inserts/updates (e.g. fixtures)
         if kwargs.get('raw'):
             return
 
-        new_instance = kwargs['instance']
-
-        # check if this is a revision model
-        if not isinstance(new_instance, RevisionModelMixin):
+        # the initial revision is only saved when the object is created
+        if not kwargs.get('created'):
             return
 
-        object_uuid_field_name = getattr(new_instance._meta, 'track_by', 'id')
-        object_uuid_field = new_instance._meta.get_field(object_uuid_field_name)
-        object_uuid = getattr_orm(new_instance, object_uuid_field_name)
-        content_type = ContentType.objects.get_for_model(new_instance)
-
-        if isinstance(object_uuid_field, models.UUIDField):
-            change_set_count = ChangeSet.objects.filter(object_type=content_type, object_uuid=object_uuid).count()
-
-        else:
-            change_set_count = ChangeSet.objects.filter(object_type=content_type, object_id=object_uuid).count()
-
-        if change_set_count > 0:
-            return  # if there is already an change-set, we do not need to save a new initial one
-
-        changed_fields = {}
-
-        # iterate over all fields that need to be tracked
-        for field_name in getattr(new_instance._meta, 'track_fields', []):
-            try:
-                # check if is foreign key --> if yes, only get the id (--> not a db lookup)
-                field = new_instance._meta.get_field(field_name)
-
-                if hasattr(field, 'remote_field') and field.remote_field:
-                    # related field, get the id
-                    if isinstance(field.remote_field, ManyToManyRel):
-                        # many to many related fields are special, we need to fetch the IDs using the manager
-                        new_value = ",".join([str(item) for item in
-                                              getattr(new_instance, field_name).all().values_list('id', flat=True)])
-                    else:
-                        new_value = getattr_orm(new_instance, field_name + "_id")
-                else:
-                    new_value = getattr(new_instance, field_name)
-            except ObjectDoesNotExist:
-                new_value = None
-            changed_fields[field_name] = (None, new_value)
+        new_instance = kwargs['instance']
 
-        # iterate over all related fields with many relationship that need to be tracked in detail
-        for relation_entry in getattr(new_instance._meta, 'track_related_many', ()):
-            relation_field_name = relation_entry[0]
-            relation_track_fields = relation_entry[1]
+        # save the changeset and change records (and the revisions of related objects) in a single transaction
+        with transaction.atomic(using=router.db_for_write(ChangeSet), savepoint=False):
+            content_type = get_content_type_for_instance(new_instance)
 
-            try:
-                # get field
-                field = new_instance._meta.get_field(relation_field_name)
-
-                if (hasattr(field, 'remote_field') and field.remote_field) or \
-                        (hasattr(field, 'field') and field.field.remote_field):
-                    new_value = serializers.serialize(
-                        'json',
-                        getattr_orm(new_instance, relation_field_name).filter(),
-                        fields=relation_track_fields
-                    )
-                else:
-                    logger.error("track_related_many field '{}' is not a relation".format(relation_field_name))
-                    new_value = None
+            # all tracked fields and related fields with many relationship are new (without track_m2m_on_post_init, the
+            # ids of many to many fields are fetched before they are changed, see m2m_changed)
+            new_values = new_instance._get_original_data()
 
-            except (ObjectDoesNotExist, ValueError):
-                new_value = None
+            change_set = ChangeSet(object_type=content_type, **new_instance._get_changeset_object_filter())
 
-            changed_fields[relation_field_name] = (None, new_value)
+            save_change_set(change_set, aggregatable=True)
 
-        change_set = ChangeSet()
-        change_set.object_type = content_type
+            # bulk create change records (the old value of all fields is None)
+            save_change_records([
+                ChangeRecord(
+                    change_set=change_set, field_name=field_name,
+                    new_value=get_change_record_value(value)
+                )
+                for field_name, value in new_values.items()
+            ])
 
-        if isinstance(object_uuid_field, models.UUIDField):
-            change_set.object_uuid = object_uuid
-            # are there any existing changesets?
-            existing_changesets = ChangeSet.objects.filter(object_uuid=object_uuid, object_type=content_type)
+            # the saved data is the new original data
+            setattr(new_instance, '__original_data__', new_values)
+            new_instance._clear_changeset_cache()
 
-        else:
-            change_set.object_id = object_uuid
-            # are there any existing changesets?
-            existing_changesets = ChangeSet.objects.filter(object_id=object_uuid, object_type=content_type)
+            RevisionModelMixin.save_related_revision(sender, **kwargs)
 
-        if existing_changesets.exists():
-            change_set.changeset_type = change_set.UPDATE_TYPE
+    @staticmethod
+    def save_model_original_m2m_data(sender, **kwargs):
+        """
+        Stores the original ids of a tracked many to many field before they are changed, for models which do not fetch
+        them when they are loaded (track_m2m_on_post_init = False). Only changes made through the manager of the field
+        (not through the reverse relation) are tracked in this case.
+        """
+        if not _is_enabled.get():
+            return
 
-        change_set.save()
+        if kwargs['action'] not in ('pre_add', 'pre_remove', 'pre_clear') or kwargs['reverse']:
+            return
 
-        change_records = []
+        instance = kwargs['instance']
 
-        # collect change records
-        for changed_field, changed_value in changed_fields.items():
-            change_record = ChangeRecord(
-                change_set=change_set, field_name=changed_field,
-                old_value=changed_value[0], new_value=changed_value[1]
-            )
+        if not isinstance(instance, RevisionModelMixin):
+            return
 
-            change_records.append(change_record)
+        tracking_options = get_tracking_options(instance)
+        original_data = getattr(instance, '__original_data__', None)
 
-        # bulk create change records
-        ChangeRecord.objects.bulk_create(change_records)
+        if tracking_options.track_m2m_on_post_init or original_data is None:
+            return
 
-        RevisionModelMixin.save_related_revision(sender, **kwargs)
+        for field_name in tracking_options.many_to_many_fields:
+            # the original ids are only fetched once, the save handlers keep them up to date
+            if field_name not in original_data and getattr(instance.__class__, field_name).through == sender:
+                original_data.update(instance._get_tracked_many_to_many_values([field_name]))
 
     @staticmethod
     def m2m_changed(sender, **kwargs):
         # ToDo: This method is completely untested and probably unreliable
-        if not RevisionModelMixin.get_enabled():
+        if not _is_enabled.get():
             return
 
         action = kwargs['action']
@@ -484,13 +1199,15 @@ Make sure that your model has a field named "changesets" that looks like this:
         instance = kwargs['instance']
         pk_set = kwargs['pk_set']
 
-        track_through_fields = getattr(instance._meta, 'track_through', [])
+        # m2m_changed is sent for all models, only models with revisions can track their many to many fields
+        if not isinstance(instance, RevisionModelMixin):
+            return
 
-        for field_name in track_through_fields:
+        for field_name in get_tracking_options(instance).track_through:
             field = getattr(instance, field_name)
             if field.through == sender:
                 # track change on field_name
-                print('Action ', action, ' on field ', field_name, ': ', pk_set)
+                logger.debug('Action %s on field %s: %s', action, field_name, pk_set)
 
                 # check if changeset exists
                 if hasattr(instance, '__m2m_change_set__'):
@@ -498,26 +1215,23 @@ Make sure that your model has a field named "changesets" that looks like this:
                     change_set = getattr(instance, '__m2m_change_set__')
                 else:
                     # create a new change set
-                    content_type = ContentType.objects.get_for_model(instance)
-                    object_uuid_field_name = getattr(instance._meta, 'track_by', 'id')
-                    object_uuid_field = instance._meta.get_field(object_uuid_field_name)
-
-                    change_set = ChangeSet()
-
-                    change_set.object_type = content_type
-
-                    if isinstance(object_uuid_field, models.UUIDField):
-                        change_set.object_uuid = getattr_orm(instance, object_uuid_field_name)
-
-                    else:
-                        change_set.object_id = getattr_orm(instance, object_uuid_field_name)
+                    change_set = ChangeSet(
+                        object_type=get_content_type_for_instance(instance), **instance._get_changeset_object_filter()
+                    )
 
                     change_set.changeset_type = change_set.UPDATE_TYPE
 
-                    change_set.save()
+                    save_change_set(change_set)
                     # store this changeset in instance, in case we get another update soon
                     setattr(instance, '__m2m_change_set__', change_set)
 
+                    revision_batch = get_revision_batch()
+
+                    if revision_batch is not None:
+                        revision_batch.add_m2m_instance(instance)
+
+                change_records = []
+
                 # iterate over the list of primary keys
                 for pk in pk_set:
                     # create a new change record for each PK
@@ -533,15 +1247,14 @@ Make sure that your model has a field named "changesets" that looks like this:
                         # in case of a delete, we store the old value (new value is None by default)
                         change_record.old_value = pk
 
-                    # save the change record
-                    change_record.save()
-                    # end for
-                    # end if
-                    # end for field_name in track_through_fields
+                    change_records.append(change_record)
+
+                # bulk create change records
+                save_change_records(change_records)
 
     @staticmethod
     def update_model_version_number(sender, **kwargs):
-        if not RevisionModelMixin.get_enabled():
+        if not _is_enabled.get():
             return
 
         # do not track raw inserts/updates (e.g. fixtures)
@@ -550,34 +1263,42 @@ Make sure that your model has a field named "changesets" that looks like this:
 
         new_instance = kwargs['instance']
 
-        # check if this is a revision model
-        if not new_instance.pk or not isinstance(new_instance, RevisionModelMixin):
+        # check if this is a saved model (new instances might already have a pk, e.g. uuids)
+        if not new_instance.pk or new_instance._state.adding:
             return
 
-        changed_fields = new_instance.changed_data
+        # without a version field there is nothing to update (and no need to determine the changed data)
+        if not new_instance.get_version_field():
+            return
+
+        # quit here if none of the tracked fields has been saved
+        if not is_tracked_save(new_instance, kwargs.get('update_fields')):
+            return
+
+        # the values of many to many and related many fields can not be changed by saving the instance, so they are
+        # kept for save_model_revision (other fields are read again, they might be changed when saving, e.g. auto_now)
+        many_values = new_instance._get_tracked_many_values()
+        new_instance.__dict__['_changeset_many_values'] = many_values
+
+        changed_fields = new_instance.get_changed_data(
+            update_fields=kwargs.get('update_fields'), many_values=many_values
+        )
 
         # quit here if there is nothing to track.
         if not changed_fields:
             return
 
-        object_uuid_field_name = getattr(new_instance._meta, 'track_by', 'id')
-        object_uuid_field = new_instance._meta.get_field(object_uuid_field_name)
-        content_type = ContentType.objects.get_for_model(new_instance)
-        object_uuid = getattr_orm(new_instance, object_uuid_field_name)
+        content_type = get_content_type_for_instance(new_instance)
+        object_filter = new_instance._get_changeset_object_filter()
 
         # are there any existing changesets?
-        if isinstance(object_uuid_field, models.UUIDField):
-            existing_changesets = ChangeSet.objects.filter(object_uuid=object_uuid, object_type=content_type)
-
-        else:
-            existing_changesets = ChangeSet.objects.filter(object_id=object_uuid, object_type=content_type)
-
-        if existing_changesets.exists():
+        if has_batched_change_set(content_type, **object_filter) \
+                or ChangeSet.objects.filter(object_type=content_type, **object_filter).exists():
             new_instance.update_version_number(content_type)
 
     @staticmethod
     def save_model_revision(sender, **kwargs):
-        if not RevisionModelMixin.get_enabled():
+        if not _is_enabled.get():
             return
 
         # do not track raw inserts/updates (e.g. fixtures)
@@ -586,223 +1307,298 @@ Make sure that your model has a field named "changesets" that looks like this:
 
         new_instance = kwargs['instance']
 
-        # check if this is a revision model
-        if not new_instance.pk or not isinstance(new_instance, RevisionModelMixin):
+        # created objects are tracked by save_initial_model_revision
+        if kwargs.get('created'):
             return
 
-        changed_fields = new_instance.changed_data
-
-        # quit here if there is nothing to track.
-        if not changed_fields:
+        # check if this is a saved model
+        if not new_instance.pk:
             return
 
-        # determine whether this is a soft delete or a restore operation
-        is_soft_delete = False
-        is_restore = False
-
-        # get track_soft_deleted_by from the current model
-        track_soft_delete_by = getattr(new_instance._meta, 'track_soft_delete_by', None)
-        if track_soft_delete_by and track_soft_delete_by in changed_fields:
-            # if len(changed_fields) > 1:
-            #     raise Exception("""Can not modify more than one field if track_soft_delete_by is changed""")
+        # quit here if none of the tracked fields has been saved
+        if not is_tracked_save(new_instance, kwargs.get('update_fields')):
+            return
 
-            # determine whether this is a soft delete or a trash
-            change_record = changed_fields[track_soft_delete_by]
+        # re-use the values of many to many and related many fields read before saving (see update_model_version_number)
+        changed_fields = new_instance.get_changed_data(
+            update_fields=kwargs.get('update_fields'),
+            many_values=new_instance.__dict__.pop('_changeset_many_values', None)
+        )
 
-            # ToDo: Why are we accessing [1] here?
-            if change_record[1] is True:
-                is_soft_delete = True
-            else:
-                is_restore = True
+        # quit here if there is nothing to track.
+        if not changed_fields:
+            return
 
-        object_uuid_field_name = getattr(new_instance._meta, 'track_by', 'id')
-        object_uuid_field = new_instance._meta.get_field(object_uuid_field_name)
-        content_type = ContentType.objects.get_for_model(new_instance)
+        # save the changeset and change records (and the revisions of related objects) in a single transaction
+        with transaction.atomic(using=router.db_for_write(ChangeSet), savepoint=False):
+            # determine whether this is a soft delete or a restore operation
+            is_soft_delete = False
+            is_restore = False
+
+            # get track_soft_deleted_by from the current model
+            tracking_options = get_tracking_options(new_instance)
+            track_soft_delete_by = tracking_options.track_soft_delete_by
+            if track_soft_delete_by and track_soft_delete_by in changed_fields:
+                # if len(changed_fields) > 1:
+                #     raise Exception("""Can not modify more than one field if track_soft_delete_by is changed""")
+
+                # determine whether this is a soft delete or a trash
+                change_record = changed_fields[track_soft_delete_by]
+
+                # ToDo: Why are we accessing [1] here?
+                if change_record[1] is True:
+                    is_soft_delete = True
+                else:
+                    is_restore = True
+
+            content_type = get_content_type_for_instance(new_instance)
+            object_filter = new_instance._get_changeset_object_filter()
+
+            change_set = ChangeSet(object_type=content_type, **object_filter)
+
+            # get the latest existing changeset (without restore/soft_delete), so we know whether there are any existing
+            # changesets, and can check if it was created by the current user within the last couple of seconds
+            latest_existing_changeset = ChangeSet.objects.filter(
+                object_type=content_type, **object_filter
+            ).exclude(
+                changeset_type__in=[ChangeSet.RESTORE_TYPE, ChangeSet.SOFT_DELETE_TYPE]
+            ).order_by('-date').first()
+
+            last_changeset = None
+            revision_batch = get_revision_batch()
+
+            update_existing_changeset = False
+
+            if has_batched_change_set(content_type, change_set.object_id, change_set.object_uuid) \
+                    or latest_existing_changeset is not None:
+                # an existing changeset already exists
+                # the operation performed can be either soft delete, restore or update
+                if is_soft_delete:
+                    change_set.changeset_type = change_set.SOFT_DELETE_TYPE
+                elif is_restore:
+                    change_set.changeset_type = change_set.RESTORE_TYPE
+                else:
+                    change_set.changeset_type = change_set.UPDATE_TYPE
 
-        change_set = ChangeSet()
+                    # batched changesets are never re-used
+                    if revision_batch is None:
+                        last_changeset = latest_existing_changeset
+
+            # check if last changeset was created by the current user within the last couple of seconds
+            if last_changeset and tracking_options.aggregate_changesets_within:
+                now = timezone.now()
+
+                if last_changeset.user == get_current_user() \
+                        and last_changeset.date > now - tracking_options.aggregate_changesets_within:
+                    # overwrite the new_changeset
+                    logger.debug("Re-using last changeset")
+                    change_set = last_changeset
+                    change_set.date = now
+                    update_existing_changeset = True
+
+            if update_existing_changeset:
+                # updating an existing changeset: fetch its change records once, and update them in memory
+                existing_change_records = {
+                    change_record.field_name: change_record
+                    for change_record in change_set.change_records.select_related(None).order_by()
+                }
+
+                new_change_records = []
+                updated_change_records = []
+                deleted_change_records = []
+
+                for changed_field, changed_value in changed_fields.items():
+                    new_value = get_change_record_value(changed_value[1])
+                    change_record = existing_change_records.get(changed_field)
+
+                    if change_record is None:
+                        new_change_records.append(ChangeRecord(
+                            change_set=change_set, field_name=changed_field,
+                            old_value=get_change_record_value(changed_value[0]),
+                            new_value=new_value
+                        ))
+                    # compare the values as they are stored in the database
+                    elif ChangeRecord._meta.get_field('new_value').to_python(new_value) == change_record.old_value:
+                        # the value has been changed back to the old value, the change record is obsolete
+                        deleted_change_records.append(change_record)
+                    else:
+                        # it already exists, therefore we need to update new value
+                        change_record.new_value = new_value
+                        updated_change_records.append(change_record)
 
-        change_set.object_type = content_type
+                if len(deleted_change_records) == len(existing_change_records) and not new_change_records:
+                    # no change record remains for this changeset --> delete the change set (and its change records)
+                    change_set.delete()
+                else:
+                    change_set.save()
 
-        if isinstance(object_uuid_field, models.UUIDField):
-            change_set.object_uuid = getattr_orm(new_instance, object_uuid_field_name)
+                    if deleted_change_records:
+                        ChangeRecord.objects.filter(
+                            pk__in=[change_record.pk for change_record in deleted_change_records]
+                        ).delete()
 
-        else:
-            change_set.object_id = getattr_orm(new_instance, object_uuid_field_name)
-
-        # are there any existing changesets (without restore/soft_delete)?
-        existing_changesets = ChangeSet.objects.filter(
-            object_uuid=change_set.object_uuid,
-            object_type=content_type
-        ).exclude(
-            changeset_type__in=[ChangeSet.RESTORE_TYPE, ChangeSet.SOFT_DELETE_TYPE]
-        )
+                    if updated_change_records:
+                        ChangeRecord.objects.bulk_update(
+                            updated_change_records, ['new_value'], batch_size=CHANGE_RECORD_BATCH_SIZE
+                        )
 
-        last_changeset = None
+                    ChangeRecord.objects.bulk_create(new_change_records, batch_size=CHANGE_RECORD_BATCH_SIZE)
 
-        update_existing_changeset = False
+            elif revision_batch is not None and revision_batch.aggregate_changes(change_set, changed_fields):
+                # the changes have been merged into the batched changeset of a previous save of this object
+                pass
 
-        if existing_changesets.exists():
-            # an existing changeset already exists
-            # the operation performed can be either soft delete, restore or update
-            if is_soft_delete:
-                change_set.changeset_type = change_set.SOFT_DELETE_TYPE
-            elif is_restore:
-                change_set.changeset_type = change_set.RESTORE_TYPE
             else:
-                change_set.changeset_type = change_set.UPDATE_TYPE
-                # get the latest changeset, so we can check if the latest of existing_changeset was created by the
-                # current user within the last couple of seconds
-                last_changeset = existing_changesets.latest()
-
-        # check if last changeset was created by the current user within the last couple of seconds
-        if last_changeset \
-                and last_changeset.user == get_current_user() \
-                and last_changeset.date > timezone.now() - timezone.timedelta(
-            seconds=getattr(new_instance._meta, 'aggregate_changesets_within_seconds', 0)
-        ):
-            # overwrite the new_changeset
-            logger.debug("Re-using last changeset")
-            change_set = last_changeset
-            change_set.date = timezone.now()
-            update_existing_changeset = True
+                save_change_set(change_set, aggregatable=True)
 
-        change_set.save()
+                # collect change records
+                change_records = []
 
-        if update_existing_changeset:
-            # updateing an existing changeset: need to check all change records for their existance
-            check_number_of_change_records = False
+                # iterate over all changed fields and create a change record for them
+                for changed_field, changed_value in changed_fields.items():
+                    change_record = ChangeRecord(
+                        change_set=change_set, field_name=changed_field,
+                        old_value=get_change_record_value(changed_value[0]),
+                        new_value=get_change_record_value(changed_value[1])
+                    )
+                    change_records.append(change_record)
 
-            for changed_field, changed_value in changed_fields.items():
-                # if the changerecord for a change_set and a field already exists, it needs to be updated
-                change_record, created = ChangeRecord.objects.get_or_create(
-                    change_set=change_set, field_name=changed_field,
-                    defaults={'old_value': changed_value[0], 'new_value': changed_value[1]},
-                )
+                # do a bulk create to increase database performance
+                save_change_records(change_records)
 
-                if not created:
-                    # it already exists, therefore we need to update new value
-                    change_record.new_value = changed_value[1]
+            # the saved data is the new original data
+            RevisionModelMixin.update_model_original_data(new_instance, changed_fields)
+            new_instance._clear_changeset_cache()
 
-                    # check if old value and new value are the same
-                    if change_record.new_value == change_record.old_value:
-                        # delete this change record
-                        change_record.delete()
-                        check_number_of_change_records = True
-                    else:
-                        # save this change record
-                        change_record.save()
+            RevisionModelMixin.save_related_revision(sender, **kwargs)
 
-            # we deleted a change record, lets make sure a change record still exists
-            if check_number_of_change_records:
-                if not change_set.change_records.all().exists():
-                    # no change record exists for this changeset --> delete the change set
-                    change_set.delete()
-
-        else:
-            # collect change records
-            change_records = []
+    @staticmethod
+    def update_model_original_data(instance, changed_fields):
+        """
+        Updates the original data stored on the instance with the new values of the changed fields, so the next
+        save is compared against the saved state of the instance.
 
-            # iterate over all changed fields and create a change record for them
-            for changed_field, changed_value in changed_fields.items():
-                change_record = ChangeRecord(
-                    change_set=change_set, field_name=changed_field,
-                    old_value=changed_value[0], new_value=changed_value[1]
-                )
-                change_records.append(change_record)
+        :param instance: the saved model instance
+        :param changed_fields: a dictionary with the field name as key, and the original and new value as content
+        """
+        original_data = getattr(instance, '__original_data__', None)
 
-            # do a bulk create to increase database performance
-            ChangeRecord.objects.bulk_create(change_records)
+        if original_data is None:
+            original_data = {}
+            setattr(instance, '__original_data__', original_data)
 
-        RevisionModelMixin.save_related_revision(sender, **kwargs)
+        # update the original data in place, the new values are already known from the changed data
+        for changed_field, changed_value in changed_fields.items():
+            original_data[changed_field] = changed_value[1]
 
     @staticmethod
     def save_model_original_data(sender, **kwargs):
-        if not RevisionModelMixin.get_enabled():
+        if not _is_enabled.get() or not _is_original_data_enabled.get():
             return
 
         instance = kwargs['instance']
-        original_data = {}
 
-        # do not save original data if model is not a RevisionModel
-        if not isinstance(instance, RevisionModelMixin):
+        # do not save original data of new instances, the initial revision stores it when they are created
+        if instance.pk is None:
             return
 
-        # iterate over all fields that need to be tracked
-        for field_name in getattr(instance._meta, 'track_fields', []):
-            try:
-                # check if is foreign key --> if yes, get id
-                field = instance._meta.get_field(field_name)
-
-                if hasattr(field, 'remote_field') and field.remote_field:
-                    # related field, get the id
-                    if isinstance(field.remote_field, ManyToManyRel):
-                        # many to many related fields are special, we need to fetch the IDs using the manager
-                        value = ",".join(
-                            [str(item) for item in getattr(instance, field_name).all().values_list('id', flat=True)])
-                    else:
-                        value = getattr_orm(instance, field_name + "_id")
-                else:
-                    value = getattr_orm(instance, field_name)
-            except (ObjectDoesNotExist, ValueError):
-                value = None
+        # store original data on the instance
+        setattr(instance, '__original_data__', instance._get_original_data())
 
-            original_data[field_name] = value
+    @staticmethod
+    def load_model_original_data(sender, **kwargs):
+        """
+        Loads the original data of instances which have been loaded without it (see bulk_load) from the database before
+        they are saved, so their changes can be determined
+        """
+        if not _is_enabled.get():
+            return
 
-        # iterate over all related fields with many relationship that need to be tracked in detail
-        for relation_entry in getattr(instance._meta, 'track_related_many', ()):
-            relation_field_name = relation_entry[0]
-            relation_track_fields = relation_entry[1]
+        # do not track raw inserts/updates (e.g. fixtures)
+        if kwargs.get('raw'):
+            return
 
-            try:
-                # get field
-                field = instance._meta.get_field(relation_field_name)
-
-                if (hasattr(field, 'remote_field') and field.remote_field) or \
-                        (hasattr(field, 'field') and field.field.remote_field):
-                    value = serializers.serialize(
-                        'json',
-                        getattr_orm(instance, relation_field_name).filter(),
-                        fields=relation_track_fields
-                    )
-                else:
-                    logger.error("track_related_many field '{}' is not a relation".format(relation_field_name))
-                    value = None
+        instance = kwargs['instance']
 
-            except (ObjectDoesNotExist, ValueError):
-                value = None
+        if instance._state.adding or hasattr(instance, '__original_data__'):
+            return
 
-            original_data[relation_field_name] = value
+        if not is_tracked_save(instance, kwargs.get('update_fields')):
+            return
 
-        # store original data on the instance
-        setattr(instance, '__original_data__', original_data)
+        try:
+            db_instance = instance.__class__._base_manager.using(kwargs.get('using')).get(pk=instance.pk)
+        except ObjectDoesNotExist:
+            return
 
+        setattr(instance, '__original_data__', db_instance._get_original_data())
 
-# on post init: store the original data (e.g., when the model is loaded from the database the first time)
-post_init.connect(
-    RevisionModelMixin.save_model_original_data,
-    dispatch_uid="django_changeset.save_model_original_data.subscriber",
-)
-# on pre save: update version number
-pre_save.connect(
-    RevisionModelMixin.update_model_version_number,
-    dispatch_uid="django_changeset.update_model_version_number.subscriber"
-)
 
-# on post save: save model changes (changes are determined based on original model data)
-post_save.connect(
-    RevisionModelMixin.save_model_revision,
-    dispatch_uid="django_changeset.save_model_revision.subscriber",
-)
-# after that: store the changed data as the "new" original data again
-post_save.connect(
-    RevisionModelMixin.save_model_original_data,
-    dispatch_uid="django_changeset.save_model_original_data.subscriber",
+def connect_revision_signals(sender, **kwargs):
+    """
+    Connects the signal handlers of RevisionModelMixin to a model using it, once the model class has been prepared.
+    Connecting them per model means saves of models without revisions do not call them at all.
+    """
+    if not issubclass(sender, RevisionModelMixin):
+        return
+
+    # historical models (e.g., rendered by migrations) are not saved through the revision signals, connecting them
+    # would only pile up receivers
+    if sender._meta.apps is not apps:
+        return
+
+    # on post init: store the original data (e.g., when the model is loaded from the database the first time), this is
+    # not needed for models without any tracked fields (there are no changes to determine)
+    if getattr(sender._meta, 'track_fields', None) or getattr(sender._meta, 'track_related_many', None):
+        post_init.connect(
+            RevisionModelMixin.save_model_original_data,
+            sender=sender,
+            dispatch_uid="django_changeset.save_model_original_data.subscriber",
+        )
+        # on pre save: load the original data of instances loaded without it (see bulk_load)
+        pre_save.connect(
+            RevisionModelMixin.load_model_original_data,
+            sender=sender,
+            dispatch_uid="django_changeset.load_model_original_data.subscriber",
+        )
+    # on pre save: update version number (only needed for models with a version field)
+    if any(isinstance(field, ChangesetVersionField) for field in sender._meta.fields):
+        pre_save.connect(
+            RevisionModelMixin.update_model_version_number,
+            sender=sender,
+            dispatch_uid="django_changeset.update_model_version_number.subscriber"
+        )
+
+    # on post save: save model changes (changes are determined based on original model data) and store the changed
+    # data as the "new" original data again
+    post_save.connect(
+        RevisionModelMixin.save_model_revision,
+        sender=sender,
+        dispatch_uid="django_changeset.save_model_revision.subscriber",
+    )
+    post_save.connect(
+        RevisionModelMixin.save_initial_model_revision,
+        sender=sender,
+        dispatch_uid="django_changeset.save_initial_model_revision.subscriber",
+    )
+
+
+# models using RevisionModelMixin can only be defined after this module has been imported, so their class_prepared
+# signal is always received here
+class_prepared.connect(
+    connect_revision_signals,
+    dispatch_uid="django_changeset.connect_revision_signals.subscriber",
 )
-post_save.connect(
-    RevisionModelMixin.save_initial_model_revision,
-    dispatch_uid="django_changeset.save_initial_model_revision.subscriber",
+# content types might get re-created by migrations, so forget about the cached ones
+post_migrate.connect(
+    clear_content_type_cache,
+    dispatch_uid="django_changeset.clear_content_type_cache.subscriber",
 )
 # many to many (m2m) hook
+m2m_changed.connect(
+    RevisionModelMixin.save_model_original_m2m_data,
+    dispatch_uid="django_changeset.save_model_original_m2m_data.subscriber",
+)
 m2m_changed.connect(
     RevisionModelMixin.m2m_changed,
     dispatch_uid="django_changeset.m2m_changed.subscriber",
@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 import logging
+import os
+import time
 import uuid
+from functools import lru_cache
 
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
 
-from django.utils.translation import gettext_lazy as _
-from django.utils.encoding import force_text
+from django.utils.translation import gettext, gettext_lazy as _
+from django.utils.encoding import force_str
+from django.utils.functional import cached_property
 
 from django_userforeignkey.models.fields import UserForeignKey
 
@@ -17,6 +21,50 @@ logger = logging.getLogger(__name__)
 changeset_related_object = getattr(settings, "DJANGO_CHANGESET_SELECT_RELATED", ["user"])
 
 
+def uuid7():
+    """
+    returns a time ordered UUID (version 7, see RFC 9562): a 48 bit unix timestamp in milliseconds followed by random
+    bits, so new primary keys are appended to the end of the primary key index instead of being inserted at random
+    positions
+    """
+    value = (time.time_ns() // 1000000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    # set the version (7) and the variant (RFC 4122/9562)
+    value = value & ~(0xf << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+
+    return uuid.UUID(int=value)
+
+
+@lru_cache(maxsize=None)
+def get_fields_by_name(model_class):
+    """
+    returns the fields of the given model class by their name (as stored in change records) and attname (built once per
+    model class)
+    """
+    fields = {field.attname: field for field in model_class._meta.fields}
+    fields.update((field.name, field) for field in model_class._meta.fields)
+
+    return fields
+
+
+@lru_cache(maxsize=None)
+def get_relations_by_related_name(model_class):
+    """ returns the related objects of the given model class by their related name (built once per model class) """
+    relations = {}
+
+    for rel in model_class._meta.related_objects:
+        # the first relation with a related name wins
+        relations.setdefault(rel.related_name, rel)
+
+    return relations
+
+
+@lru_cache(maxsize=None)
+def get_choices_by_value(field):
+    """ returns the (flat) choices of the given field as a dict of value -> display (built once per field) """
+    return dict(field.flatchoices)
+
+
 class ChangeSetManager(models.Manager):
     """
     ChangeSet Manager that forces all ChangeSet queries to contain at least the "user" foreign relation
@@ -27,6 +75,17 @@ class ChangeSetManager(models.Manager):
         )
 
 
+class ChangeRecordManager(models.Manager):
+    """
+    ChangeRecord Manager that forces all ChangeRecord queries to contain the "change_set" foreign relation (and the
+    relations of the ChangeSet Manager), as the change set is used by almost every property of a change record
+    """
+    def get_queryset(self):
+        return super(ChangeRecordManager, self).get_queryset().select_related(
+            'change_set', *['change_set__%s' % related_object for related_object in changeset_related_object]
+        )
+
+
 class AbstractChangeSet(models.Model):
     """ Basic changeset/revision model which contains the ``user`` that modified the object ``object_type`` """
     objects = ChangeSetManager()
@@ -48,9 +107,9 @@ class AbstractChangeSet(models.Model):
 
     id = models.UUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
-        verbose_name=_(u"Primary Key as Python UUID4 Field")
+        verbose_name=_(u"Primary Key as Python UUID7 Field")
     )
 
     changeset_type = models.CharField(
@@ -93,10 +152,13 @@ class AbstractChangeSet(models.Model):
         abstract = True
 
     def __unicode__(self):
-        return _(u"%(changeset_type)s on %(app_label)s.%(model)s %(uuid)s at date %(date)s by %(user)s") % {
+        # the content types are cached by the ContentType manager, so there is no need to query the object type
+        object_type = ContentType.objects.get_for_id(self.object_type_id)
+
+        return gettext(u"%(changeset_type)s on %(app_label)s.%(model)s %(uuid)s at date %(date)s by %(user)s") % {
             'changeset_type': self.get_changeset_type_display(),
-            'app_label': self.object_type.app_label,
-            'model': self.object_type.model,
+            'app_label': object_type.app_label,
+            'model': object_type.model,
             'uuid': self.object_uuid,
             'date': self.date,
             'user': self.user,
@@ -121,17 +183,26 @@ class ChangeSet(AbstractChangeSet):
         db_index=True,
     )
 
+    class Meta(AbstractChangeSet.Meta):
+        indexes = [
+            # history of an object, newest first (also used for lookups by object_type and object_uuid only)
+            models.Index(fields=['object_type', 'object_uuid', '-date'], name='changeset_object_uuid_date'),
+            # history of an object tracked by an integer id, newest first
+            models.Index(fields=['object_type', 'object_id', '-date'], name='changeset_object_id_date'),
+        ]
+
 
 class ChangeRecord(models.Model):
     """ A change_record represents detailed change information, like which field was changed and what the old aswell as
     the new value of the field look like. It is related to a ``change_set``.
     """
+    objects = ChangeRecordManager()
 
     id = models.UUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
-        verbose_name=_(u"Primary Key as Python UUID4 Field")
+        verbose_name=_(u"Primary Key as Python UUID7 Field")
     )
 
     change_set = models.ForeignKey(
@@ -176,19 +247,111 @@ class ChangeRecord(models.Model):
         ordering = ['-change_set__date', 'field_name', ]
 
     def __unicode__(self):
-        return _(u"%(label)s: '%(from)s' to '%(to)s'") % {
-            'label': force_text(self.field_verbose_name),
-            'from': force_text(self.old_value_display),
-            'to': force_text(self.new_value_display),
+        return gettext(u"%(label)s: '%(from)s' to '%(to)s'") % {
+            'label': force_str(self.field_verbose_name),
+            'from': force_str(self.old_value_display),
+            'to': force_str(self.new_value_display),
         }
 
     def __str__(self):
         return self.__unicode__()
 
+    @classmethod
+    def prefetch_related_objects(cls, change_records):
+        """
+        Loads the related objects of all given change records with one query per related model, so accessing
+        related_object does not query the database per change record.
+
+        Example: ChangeRecord.prefetch_related_objects(change_set.change_records.all())
+
+        :param change_records: an iterable of change records
+        :returns: the change records (as a list)
+        :rtype: list
+        """
+        change_records = list(change_records)
+        # the related class of each change record (looked up once, as a missing relation logs a warning)
+        related_classes = [
+            (change_record, change_record._get_related_class())
+            for change_record in change_records if change_record.is_related
+        ]
+        related_pks = {}
+
+        for change_record, related_class in related_classes:
+            if related_class:
+                related_pks.setdefault(related_class, set()).add(change_record.new_value)
+
+        from django_changeset.models import RevisionModelMixin
+
+        # the related objects are only displayed, there is no need to store their original data
+        with RevisionModelMixin.bulk_load():
+            related_objects = {
+                related_class: {
+                    force_str(related_object.pk): related_object
+                    for related_object in related_class.objects.filter(pk__in=pks)
+                }
+                for related_class, pks in related_pks.items()
+            }
+
+        for change_record, related_class in related_classes:
+            change_record.__dict__['_related_object'] = related_objects.get(related_class, {}).get(
+                change_record.new_value
+            )
+
+        return change_records
+
+    @classmethod
+    def prefetch_display_values(cls, change_records):
+        """
+        Loads the objects referenced by the old and new values of all given change records of foreign key fields with
+        one query per referenced model, so accessing old_value_display and new_value_display does not query the
+        database per change record.
+
+        Example: ChangeRecord.prefetch_display_values(change_set.change_records.all())
+
+        :param change_records: an iterable of change records
+        :returns: the change records (as a list)
+        :rtype: list
+        """
+        change_records = list(change_records)
+        referenced_pks = {}
+
+        for change_record in change_records:
+            field = change_record._get_field(supress_warning=True)
+
+            if field and isinstance(field, models.ForeignKey):
+                pks = referenced_pks.setdefault(field.related_model, set())
+                pks.update(value for value in (change_record.old_value, change_record.new_value) if value is not None)
+
+        from django_changeset.models import RevisionModelMixin
+
+        # the referenced objects are only displayed, there is no need to store their original data
+        with RevisionModelMixin.bulk_load():
+            referenced_objects = {
+                model_class: {
+                    force_str(referenced_object.pk): referenced_object
+                    for referenced_object in model_class.objects.filter(pk__in=pks)
+                }
+                for model_class, pks in referenced_pks.items()
+            }
+
+        for change_record in change_records:
+            field = change_record._get_field(supress_warning=True)
+
+            if field and isinstance(field, models.ForeignKey):
+                objects = referenced_objects[field.related_model]
+                change_record.__dict__['_old_value_display'] = objects.get(change_record.old_value)
+                change_record.__dict__['_new_value_display'] = objects.get(change_record.new_value)
+
+        return change_records
+
     def _get_related_object(self):
         if not self.is_related:
             return
 
+        # the related object has been loaded by prefetch_related_objects
+        if '_related_object' in self.__dict__:
+            return self.__dict__['_related_object']
+
         related_class = self._get_related_class()
 
         if not related_class:
@@ -197,44 +360,56 @@ class ChangeRecord(models.Model):
         try:
             return related_class.objects.get(pk=self.new_value)
         except related_class.DoesNotExist:
-            logger.warning(u"Related object of model '%(model)s' with pk '%(pk)s' does not exist." % {
-                'model': force_text(related_class),
-                'pk': force_text(self.new_value),
-            })
+            logger.warning(u"Related object of model '%s' with pk '%s' does not exist.", related_class, self.new_value)
 
             return None
 
-    def _get_field(self, supress_warning=False):
-        model_class = self.change_set.object_type.model_class()
+    def _get_model_class(self):
+        # the content types are cached by the ContentType manager, so there is no need to query the object type
+        return ContentType.objects.get_for_id(self.change_set.object_type_id).model_class()
+
+    @cached_property
+    def _field(self):
+        """ the field for the records field_name (looked up once, as it is used by several display properties) """
+        # changes on related entities are recorded with the name of the (reverse) relation, which is never a field
+        if self.is_related:
+            return None
+
+        model_class = self._get_model_class()
+
+        return get_fields_by_name(model_class).get(self.field_name)
 
+    def _get_field(self, supress_warning=False):
         # try to find the field for the records field_name
-        for field in model_class._meta.fields:
-            if field.attname == self.field_name:
-                return field
+        field = self._field
+
+        if field:
+            return field
 
         # no field for the field_name found
         if not supress_warning:
-            logger.warning(u"Field for this change record does not exist on model '%s'." % force_text(model_class))
+            logger.warning(u"Field for this change record does not exist on model '%s'.", self._get_model_class())
 
         return None
 
     def _get_relation(self):
-        model_class = self.change_set.object_type.model_class()
+        model_class = self._get_model_class()
 
         # try to find the relation for the records field_name
-        for rel in model_class._meta.related_objects:
-            if rel.related_name == self.field_name:
-                return rel
+        rel = get_relations_by_related_name(model_class).get(self.field_name)
+
+        if rel:
+            return rel
 
         # no relation for the field_name found
-        logger.warning(u"Relation for this change record does not exist on model '%s'." % force_text(model_class))
+        logger.warning(u"Relation for this change record does not exist on model '%s'.", model_class)
 
         return None
 
     def _get_related_class(self):
         field = self._get_field(supress_warning=True) # get the field, but dont log a warning
         if field:
-            return field.remote_field.to
+            return field.related_model
 
         relation = self._get_relation()
         if relation:
@@ -268,9 +443,13 @@ class ChangeRecord(models.Model):
         field = self._get_field(supress_warning=True)
 
         if field and isinstance(field, models.ForeignKey):
-            return self._get_object_or_none(field.remote_field.to, pk=self.old_value)
+            # the referenced object has been loaded by prefetch_display_values
+            if '_old_value_display' in self.__dict__:
+                return self.__dict__['_old_value_display']
+
+            return self._get_object_or_none(field.related_model, pk=self.old_value)
         elif field and hasattr(field, 'flatchoices'):
-            return force_text(dict(field.flatchoices).get(self.old_value, self.old_value), strings_only=True)
+            return force_str(get_choices_by_value(field).get(self.old_value, self.old_value), strings_only=True)
 
         return self.old_value
 
@@ -280,8 +459,12 @@ class ChangeRecord(models.Model):
         field = self._get_field(supress_warning=True)
 
         if field and isinstance(field, models.ForeignKey):
-            return self._get_object_or_none(field.remote_field.to, pk=self.new_value)
+            # the referenced object has been loaded by prefetch_display_values
+            if '_new_value_display' in self.__dict__:
+                return self.__dict__['_new_value_display']
+
+            return self._get_object_or_none(field.related_model, pk=self.new_value)
         elif field and hasattr(field, 'flatchoices'):
-            return force_text(dict(field.flatchoices).get(self.new_value, self.new_value), strings_only=True)
+            return force_str(get_choices_by_value(field).get(self.new_value, self.new_value), strings_only=True)
 
         return self.new_value
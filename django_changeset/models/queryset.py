@@ -1,22 +1,27 @@
 from django_userforeignkey.request import get_current_user
 from django.contrib.contenttypes.models import ContentType
-from django_changeset.models import ChangeSet
+from django_changeset.models.mixins import get_content_type_for_model
 
 
 def get_content_type_of(model):
     """
-    Helper Method which gets the ContentType object (ContentType.objects.get_for_model(model)) for the given model
+    Helper Method which gets the (cached) ContentType object (ContentType.objects.get_for_model(model)) for the given
+    model
     :param model: the class/model
     :returns: the ContentType object of the model
     :rtype: django.contrib.contenttypes.models.ContentType
     """
+    # the content types are cached per model class
+    if not isinstance(model, type):
+        model = model.__class__
+
     # if we are working on a deferred proxy class, we first need to get
     # the real model class, so we can save a new instance if we need.
     if getattr(model, '_deferred', False):
         model = model.__mro__[1]
 
     try:
-        return ContentType.objects.get_for_model(model)
+        return get_content_type_for_model(model)
     except ContentType.DoesNotExist:
         return None
 
@@ -59,7 +64,7 @@ class ChangeSetQuerySetMixin(object):
         if user.is_staff:
             return self.all()
         else:
-            return self.created_by_current_user(args, kwargs)
+            return self.created_by_current_user(*args, **kwargs)
 
     def created_by_current_user(self, *args, **kwargs):
         """
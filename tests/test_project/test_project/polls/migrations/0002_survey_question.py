@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_changeset.models.mixins
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0001_initial_squashed_0006_auto_20171015_1907'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Survey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('version_number', django_changeset.models.mixins.ChangesetVersionField(default=0)),
+            ],
+            bases=(models.Model, django_changeset.models.mixins.RevisionModelMixin),
+        ),
+        migrations.CreateModel(
+            name='Question',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('text', models.CharField(max_length=200)),
+                ('version_number', django_changeset.models.mixins.ChangesetVersionField(default=0)),
+                ('survey', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='polls.survey')),
+            ],
+            bases=(models.Model, django_changeset.models.mixins.RevisionModelMixin),
+        ),
+    ]
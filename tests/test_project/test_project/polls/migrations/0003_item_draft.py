@@ -0,0 +1,68 @@
+# Generated by Django 3.2.25 on 2026-10-15 22:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_changeset.models.mixins
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_survey_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Draft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('text', models.CharField(max_length=200)),
+            ],
+            bases=(models.Model, django_changeset.models.mixins.RevisionModelMixin),
+        ),
+        migrations.CreateModel(
+            name='Label',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Note',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.CharField(max_length=200)),
+            ],
+            bases=(models.Model, django_changeset.models.mixins.RevisionModelMixin),
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Item',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('labels', models.ManyToManyField(blank=True, related_name='items', to='polls.Label')),
+                ('tags', models.ManyToManyField(blank=True, related_name='items', to='polls.Tag')),
+            ],
+            bases=(models.Model, django_changeset.models.mixins.RevisionModelMixin),
+        ),
+        migrations.CreateModel(
+            name='LazyItem',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('polls.item',),
+        ),
+    ]
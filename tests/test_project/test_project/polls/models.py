@@ -1,9 +1,14 @@
 import datetime
+import uuid
 
 from django.db import models
 from django.utils import timezone
 from django_userforeignkey.models.fields import UserForeignKey
 
+from django_changeset.models import RevisionModelMixin
+from django_changeset.models.fields import ChangeSetRelation
+from django_changeset.models.mixins import ChangesetVersionField
+
 
 class Poll(models.Model):
     question = models.CharField(max_length=200)
@@ -43,3 +48,80 @@ class ActualVote(models.Model):
     poll = models.ForeignKey(Poll, verbose_name="Which question has been voted for?", on_delete=models.CASCADE)
     choice = models.ForeignKey(Choice, verbose_name="Which choice was chosen?", on_delete=models.CASCADE)
     user = UserForeignKey(auto_user_add=True, verbose_name="Which user has voted?", related_name="actual_votes")
+
+
+class Survey(models.Model, RevisionModelMixin):
+    class Meta:
+        track_fields = ('title', )
+        track_related_many = (('questions', ('text', )), )
+
+    title = models.CharField(max_length=200)
+    version_number = ChangesetVersionField()
+
+    changesets = ChangeSetRelation()
+
+
+class Question(models.Model, RevisionModelMixin):
+    class Meta:
+        track_by = 'id'
+        track_fields = ('text', 'survey', )
+        track_related = ('survey', )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    survey = models.ForeignKey(Survey, related_name="questions", on_delete=models.CASCADE)
+    text = models.CharField(max_length=200)
+    version_number = ChangesetVersionField()
+
+    changesets = ChangeSetRelation(object_id_field='object_uuid')
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=200)
+
+
+class Label(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=200)
+
+
+class BaseItem(models.Model, RevisionModelMixin):
+    """
+    BaseItem is needed for proper MRO within Python/Django Models
+    """
+    class Meta:
+        abstract = True
+
+    name = models.CharField(max_length=200)
+
+    changesets = ChangeSetRelation()
+
+
+class Item(BaseItem):
+    class Meta:
+        track_fields = ('name', 'tags', 'labels', )
+        track_through = ('tags', )
+
+    tags = models.ManyToManyField(Tag, related_name="items", blank=True)
+    labels = models.ManyToManyField(Label, related_name="items", blank=True)
+
+
+class LazyItem(Item):
+    class Meta:
+        proxy = True
+        track_fields = ('name', 'tags', 'labels', )
+        track_m2m_on_post_init = False
+
+
+class Note(models.Model, RevisionModelMixin):
+    text = models.CharField(max_length=200)
+
+
+class Draft(models.Model, RevisionModelMixin):
+    class Meta:
+        track_fields = ('title', 'text', )
+        aggregate_changesets_within_seconds = 60
+
+    title = models.CharField(max_length=200)
+    text = models.CharField(max_length=200)
+
+    changesets = ChangeSetRelation()
@@ -1,12 +1,27 @@
+import copy
 import datetime
+import pickle
+import uuid
+from types import SimpleNamespace
 
+from django.apps import apps
 from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.state import ProjectState
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save
 from django.test import Client
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
-from .models import ActualVote, Choice, Poll
+from django_changeset.models import ChangeRecord, ChangeSet, RevisionModelMixin
+from django_changeset.models.mixins import ConcurrentUpdateException
+from django_changeset.models.queryset import ChangeSetQuerySetMixin
+from django_userforeignkey.request import current_request, set_current_request
+
+from .models import ActualVote, BaseItem, Choice, Draft, Item, Label, LazyItem, Note, Poll, Question, Survey, Tag
 
 
 class GeneralAuthTest(TestCase):
@@ -254,3 +269,660 @@ class PollVoteTests(TestCase):
         # check if ActualVotes is there (should only be 1 vote)
         votes = ActualVote.objects.filter(poll=poll)
         self.assertTrue(len(votes) == 1)
+
+
+class RevisionModelMixinTests(TestCase):
+    def test_pickle_and_copy_tracked_instance(self):
+        """
+        Instances tracking related objects (track_related_many) should survive pickling and copying, including their
+        original data
+        """
+        survey = Survey.objects.create(title='Survey')
+        Question.objects.create(survey=survey, text='What is the question?')
+        survey = Survey.objects.get(pk=survey.pk)
+
+        for copied_survey in (pickle.loads(pickle.dumps(survey)), copy.deepcopy(survey)):
+            self.assertEqual(copied_survey.__original_data__, survey.__original_data__)
+            self.assertEqual(
+                copied_survey.__original_data__['questions'].serialize(),
+                survey.__original_data__['questions'].serialize()
+            )
+
+        copied_survey = pickle.loads(pickle.dumps(survey))
+        copied_survey.title = 'Changed survey'
+        copied_survey.save()
+
+        change_set = survey.changesets.first()
+        self.assertEqual(change_set.changeset_type, ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'new_value')), [
+            ('title', 'Changed survey'),
+        ])
+
+    def test_historical_models_are_not_connected(self):
+        """
+        Rendering historical models (as done by migrations) should not connect any revision signals
+        """
+        receivers = len(post_save.receivers)
+
+        for _ in range(3):
+            ProjectState.from_apps(apps).apps
+
+        self.assertEqual(len(post_save.receivers), receivers)
+
+    def test_signals_are_connected_per_model(self):
+        """
+        The revision signals should only be connected to models using RevisionModelMixin (the post_init signal only to
+        models with tracked fields), including proxy models, but not abstract models
+        """
+        # models without RevisionModelMixin
+        self.assertFalse(post_init.has_listeners(Tag))
+        self.assertFalse(post_save.has_listeners(Tag))
+
+        # models without tracked fields do not need their original data
+        self.assertFalse(post_init.has_listeners(Note))
+        self.assertTrue(post_save.has_listeners(Note))
+
+        # abstract models are never prepared, their subclasses (and proxy models of these) are
+        self.assertFalse(post_init.has_listeners(BaseItem))
+        self.assertFalse(post_save.has_listeners(BaseItem))
+        self.assertTrue(post_init.has_listeners(Item))
+        self.assertTrue(post_init.has_listeners(LazyItem))
+        self.assertTrue(post_save.has_listeners(LazyItem))
+
+        item = LazyItem.objects.create(name='Item')
+        item.name = 'Changed item'
+        item.save()
+
+        self.assertEqual(list(item.changesets.values_list('changeset_type', flat=True)), [
+            ChangeSet.UPDATE_TYPE, ChangeSet.INSERT_TYPE
+        ])
+
+    def test_save_foreign_key_with_update_fields_attname(self):
+        """
+        Changes of tracked foreign keys should be recorded if they are saved with their attname in update_fields
+        """
+        survey = Survey.objects.create(title='Survey')
+        other_survey = Survey.objects.create(title='Other survey')
+        question = Question.objects.create(survey=survey, text='What is the question?')
+
+        question.survey = other_survey
+        question.save(update_fields=['survey_id'])
+
+        change_set = question.changesets.first()
+        self.assertEqual(change_set.changeset_type, ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'old_value', 'new_value')), [
+            ('survey', str(survey.pk), str(other_survey.pk)),
+        ])
+
+    def test_save_instance_loaded_with_bulk_load(self):
+        """
+        Changes of instances loaded within bulk_load (without their original data) should be tracked when they are saved
+        """
+        survey = Survey.objects.create(title='Survey')
+        Question.objects.create(survey=survey, text='What is the question?')
+
+        with RevisionModelMixin.bulk_load():
+            question = Question.objects.get(survey=survey)
+            self.assertFalse(hasattr(question, '__original_data__'))
+
+        question.text = 'What is the answer?'
+        question.save()
+
+        change_set = question.changesets.first()
+        self.assertEqual(change_set.changeset_type, ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'old_value', 'new_value')), [
+            ('text', 'What is the question?', 'What is the answer?'),
+        ])
+        self.assertEqual(question.version_number, 1)
+
+    def test_prefetch_display_values(self):
+        """
+        The objects referenced by the old and new values of a tracked foreign key should be loaded with a single query
+        """
+        survey = Survey.objects.create(title='Survey')
+        other_survey = Survey.objects.create(title='Other survey')
+        question = Question.objects.create(survey=survey, text='What is the question?')
+        question.survey = other_survey
+        question.save()
+
+        with self.assertNumQueries(2):
+            change_records = ChangeRecord.prefetch_display_values(
+                ChangeRecord.objects.filter(change_set__object_uuid=question.pk, field_name='survey')
+            )
+
+        with self.assertNumQueries(0):
+            self.assertCountEqual(
+                [(record.old_value_display, record.new_value_display) for record in change_records],
+                [(None, survey), (survey, other_survey)]
+            )
+            self.assertEqual(change_records[0].field_verbose_name, 'survey')
+
+    def test_prefetch_related_objects(self):
+        """
+        The related objects of change records on related entities should be loaded with a single query per related
+        model, looking up the related class of each change record once
+        """
+        survey = Survey.objects.create(title='Survey')
+        questions = [Question.objects.create(survey=survey, text='Question %d' % i) for i in range(2)]
+        # a change record of a relation which does not exist (anymore)
+        ChangeRecord.objects.create(
+            change_set=survey.changesets.get(changeset_type=ChangeSet.INSERT_TYPE), field_name='answers',
+            new_value=str(questions[0].pk), is_related=True
+        )
+
+        # the change records, and the questions
+        with self.assertNumQueries(2), self.assertLogs('django_changeset.models.models', 'WARNING') as logs:
+            change_records = ChangeRecord.prefetch_related_objects(
+                ChangeRecord.objects.filter(change_set__object_id=survey.pk, is_related=True)
+            )
+
+        self.assertEqual(len(logs.output), 1)
+
+        with self.assertNumQueries(0):
+            self.assertCountEqual(
+                [(record.field_name, record.related_object) for record in change_records],
+                [('questions', questions[0]), ('questions', questions[1]), ('answers', None)]
+            )
+            self.assertFalse(hasattr(change_records[0].related_object, '__original_data__'))
+
+    def test_create_instance_with_version_field(self):
+        """
+        Creating an instance with a version field (and a primary key set before saving) should not update its version
+        """
+        survey = Survey.objects.create(title='Survey')
+        question = Question.objects.create(survey=survey, text='What is the question?')
+
+        self.assertEqual(question.version_number, 0)
+        self.assertNotIn('_changeset_many_values', question.__dict__)
+        self.assertEqual(question.changesets.get().changeset_type, ChangeSet.INSERT_TYPE)
+
+    def test_concurrent_update(self):
+        """
+        Saving an instance whose version number has been bumped by a concurrent update should raise a
+        ConcurrentUpdateException, without saving the instance or a changeset
+        """
+        survey = Survey.objects.create(title='Survey')
+        concurrent_survey = Survey.objects.get(pk=survey.pk)
+
+        survey.title = 'Changed survey'
+        survey.save()
+        self.assertEqual(survey.version_number, 1)
+
+        concurrent_survey.title = 'Concurrently changed survey'
+
+        with self.assertRaises(ConcurrentUpdateException) as context:
+            concurrent_survey.save()
+
+        self.assertEqual(context.exception.latest_version_number, 1)
+        self.assertEqual(context.exception.orig_data.title, 'Changed survey')
+        self.assertEqual(concurrent_survey.version_number, 0)
+        self.assertEqual(Survey.objects.values_list('title', 'version_number').get(pk=survey.pk), ('Changed survey', 1))
+        self.assertEqual(survey.changesets.count(), 2)
+
+    def test_batched_revisions_rollback(self):
+        """
+        If batched revisions are left with an exception, the saves within the batch should be rolled back together
+        with their changesets
+        """
+        with self.assertRaises(ValueError):
+            with RevisionModelMixin.batched_revisions():
+                Survey.objects.create(title='Survey')
+                raise ValueError
+
+        self.assertFalse(Survey.objects.exists())
+        self.assertFalse(ChangeSet.objects.exists())
+
+        with RevisionModelMixin.batched_revisions():
+            survey = Survey.objects.create(title='Survey')
+
+        self.assertEqual(survey.changesets.get().changeset_type, ChangeSet.INSERT_TYPE)
+
+    def test_enabled_as_decorator(self):
+        """
+        enabled() should also work as a decorator
+        """
+        @RevisionModelMixin.enabled(False)
+        def create_survey():
+            self.assertFalse(RevisionModelMixin.get_enabled())
+            return Survey.objects.create(title='Survey')
+
+        survey = create_survey()
+        create_survey()
+
+        self.assertTrue(RevisionModelMixin.get_enabled())
+        self.assertFalse(survey.changesets.exists())
+
+    def test_related_enabled_as_decorator(self):
+        """
+        related_enabled() should also work as a decorator
+        """
+        survey = Survey.objects.create(title='Survey')
+
+        @RevisionModelMixin.related_enabled(False)
+        def create_question():
+            self.assertFalse(RevisionModelMixin.get_related_enabled())
+            return Question.objects.create(survey=survey, text='What is the question?')
+
+        question = create_question()
+
+        self.assertTrue(RevisionModelMixin.get_related_enabled())
+        self.assertEqual(question.changesets.count(), 1)
+        self.assertEqual(survey.changesets.count(), 1)
+
+    def test_bulk_load_as_decorator(self):
+        """
+        bulk_load() should also work as a decorator
+        """
+        survey = Survey.objects.create(title='Survey')
+
+        @RevisionModelMixin.bulk_load()
+        def load_survey():
+            return Survey.objects.get(pk=survey.pk)
+
+        self.assertFalse(hasattr(load_survey(), '__original_data__'))
+        self.assertTrue(hasattr(Survey.objects.get(pk=survey.pk), '__original_data__'))
+
+
+class ManyToManyTrackingTests(TestCase):
+    def setUp(self):
+        self.tags = [Tag.objects.create(name='Tag %d' % i) for i in range(2)]
+        self.labels = [Label.objects.create(name='Label %d' % i) for i in range(2)]
+
+        for i in range(3):
+            item = Item.objects.create(name='Item %d' % i)
+            item.tags.set(self.tags)
+            item.labels.set(self.labels)
+
+    def test_load_many_to_many_ids(self):
+        """
+        The ids of all tracked many to many fields of a loaded object should be fetched with a single query
+        """
+        with self.assertNumQueries(4):
+            items = list(Item.objects.all())
+
+        # prefetched objects are only assigned once all objects have been loaded, so they do not avoid these queries
+        with self.assertNumQueries(6):
+            list(Item.objects.prefetch_related('tags', 'labels'))
+
+        # unless the many to many ids are not fetched when loading objects
+        with self.assertNumQueries(3):
+            list(LazyItem.objects.prefetch_related('tags', 'labels'))
+
+        self.assertEqual(items[0].__original_data__['tags'], frozenset(tag.pk for tag in self.tags))
+        self.assertEqual(items[0].__original_data__['labels'], frozenset(label.pk for label in self.labels))
+
+    def test_query_many_to_many_ids_of_several_fields(self):
+        """
+        The ids of several many to many fields should be fetched with a single query, and be converted back to the
+        type of the primary key of the related model (an integer for tags, an UUID for labels)
+        """
+        item = Item.objects.first()
+
+        with self.assertNumQueries(1):
+            values = item._get_tracked_many_to_many_values(('tags', 'labels'))
+
+        self.assertEqual(values, {
+            'tags': frozenset(tag.pk for tag in self.tags),
+            'labels': frozenset(label.pk for label in self.labels),
+        })
+        self.assertTrue(all(isinstance(pk, int) for pk in values['tags']))
+        self.assertTrue(all(isinstance(pk, uuid.UUID) for pk in values['labels']))
+
+        # fields without any related objects are empty sets
+        item.labels.clear()
+
+        with self.assertNumQueries(1):
+            values = item._get_tracked_many_to_many_values(('tags', 'labels'))
+
+        self.assertEqual(values, {'tags': frozenset(tag.pk for tag in self.tags), 'labels': frozenset()})
+
+    def test_save_prefetched_many_to_many_ids(self):
+        """
+        Saving an object should read the ids of prefetched many to many fields from the prefetch cache
+        """
+        item = Item.objects.get(name='Item 0')
+        prefetched_item = Item.objects.prefetch_related('tags', 'labels').get(name='Item 0')
+
+        with CaptureQueriesContext(connection) as context:
+            item.name = 'Changed item'
+            item.save()
+
+        with self.assertNumQueries(len(context.captured_queries) - 1):
+            prefetched_item.name = 'Changed again'
+            prefetched_item.save()
+
+    def test_create_without_track_m2m_on_post_init(self):
+        """
+        Creating an object without track_m2m_on_post_init should not query its many to many fields, their ids are
+        fetched before they are changed
+        """
+        with self.assertNumQueries(3):
+            item = LazyItem.objects.create(name='Lazy item')
+
+        self.assertNotIn('tags', item.__original_data__)
+        self.assertEqual(
+            list(item.changesets.get().change_records.values_list('field_name', flat=True)), ['name']
+        )
+
+        item.labels.add(self.labels[0])
+        self.assertEqual(item.__original_data__['labels'], frozenset())
+
+        item.name = 'Changed lazy item'
+        item.save()
+
+        change_set = item.changesets.first()
+        self.assertEqual(change_set.changeset_type, ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'new_value')), [
+            ('labels', str(self.labels[0].pk)),
+            ('name', 'Changed lazy item'),
+        ])
+
+
+class ChangeSetPropertiesTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(username='creator', password='top_secret')
+        self.editor = User.objects.create_user(username='editor', password='top_secret')
+
+        for i in range(2):
+            token = set_current_request(SimpleNamespace(user=self.creator))
+
+            try:
+                draft = Draft.objects.create(title='Draft %d' % i, text='Text')
+            finally:
+                current_request.reset(token)
+
+            token = set_current_request(SimpleNamespace(user=self.editor))
+
+            try:
+                draft.title = 'Changed draft %d' % i
+                draft.save()
+            finally:
+                current_request.reset(token)
+
+    def assert_changeset_properties(self, draft):
+        insert_change_set = draft.changesets.get(changeset_type=ChangeSet.INSERT_TYPE)
+        update_change_set = draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+
+        self.assertEqual(draft.cs_created_by, self.creator)
+        self.assertEqual(draft.cs_created_at, insert_change_set.date)
+        # the latest changeset is the newest one (not the oldest one)
+        self.assertEqual(draft.cs_last_modified_by, self.editor)
+        self.assertEqual(draft.cs_last_modified_at, update_change_set.date)
+
+    def test_changeset_properties(self):
+        """
+        The cs_* properties should read the insert and the latest changeset, which are cached on the instance until a
+        new changeset is saved
+        """
+        draft = Draft.objects.first()
+
+        self.assert_changeset_properties(draft)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(draft.cs_last_modified_by, self.editor)
+
+        token = set_current_request(SimpleNamespace(user=self.creator))
+
+        try:
+            draft.title = 'Draft'
+            draft.save()
+        finally:
+            current_request.reset(token)
+
+        self.assertEqual(draft.cs_last_modified_by, self.creator)
+
+    def test_changeset_properties_with_a_single_query(self):
+        """
+        The insert and the latest changeset behind all cs_* properties should be fetched with a single query
+        """
+        draft = Draft.objects.first()
+        insert_change_set = draft.changesets.get(changeset_type=ChangeSet.INSERT_TYPE)
+        update_change_set = draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                (draft.cs_created_by, draft.cs_created_at, draft.cs_last_modified_by, draft.cs_last_modified_at),
+                (self.creator, insert_change_set.date, self.editor, update_change_set.date)
+            )
+
+    def test_prefetch_changesets(self):
+        """
+        The cs_* properties of objects with prefetched changesets should not query the database
+        """
+        # the drafts, and the changesets with their users
+        with self.assertNumQueries(2):
+            drafts = list(Draft.prefetch_changesets(Draft.objects.all()))
+
+        with self.assertNumQueries(0):
+            for draft in drafts:
+                self.assertEqual(draft.cs_created_by, self.creator)
+                self.assertEqual(draft.cs_last_modified_by, self.editor)
+
+        for draft in drafts:
+            self.assert_changeset_properties(draft)
+
+
+class ChangeSetAggregationTests(TestCase):
+    def setUp(self):
+        # the draft is created without a user, so its insert changeset is not aggregated with the following changes
+        self.draft = Draft.objects.create(title='Draft', text='Text')
+        self.user = User.objects.create_user(username='user', password='top_secret')
+        self.token = set_current_request(SimpleNamespace(user=self.user))
+
+    def tearDown(self):
+        current_request.reset(self.token)
+
+    def test_update_change_records(self):
+        """
+        Changes within aggregate_changesets_within_seconds should update the change records of the latest changeset
+        in bulk, and delete change records (or the whole changeset) of values which have been changed back
+        """
+        draft = self.draft
+        draft.title = 'Changed draft'
+        draft.save()
+
+        change_set = draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+
+        # a new change record is created, and the existing one is updated
+        draft.title = 'Changed draft again'
+        draft.text = 'Changed text'
+
+        # update the draft, fetch the latest changeset and its change records, update the changeset, update and create
+        # the change records
+        with self.assertNumQueries(6):
+            draft.save()
+
+        self.assertEqual(draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE), change_set)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'old_value', 'new_value')), [
+            ('text', 'Text', 'Changed text'),
+            ('title', 'Draft', 'Changed draft again'),
+        ])
+
+        # the change record of a value which has been changed back is deleted
+        draft.title = 'Draft'
+
+        # update the draft, fetch the latest changeset and its change records, update the changeset, delete the change
+        # record
+        with self.assertNumQueries(5):
+            draft.save()
+
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'old_value', 'new_value')), [
+            ('text', 'Text', 'Changed text'),
+        ])
+
+        # if all values have been changed back, the changeset is deleted
+        draft.text = 'Text'
+
+        # update the draft, fetch the latest changeset and its change records, delete the change records and the
+        # changeset
+        with self.assertNumQueries(5):
+            draft.save()
+
+        self.assertEqual(list(draft.changesets.values_list('changeset_type', flat=True)), [ChangeSet.INSERT_TYPE])
+        self.assertFalse(ChangeRecord.objects.filter(change_set_id=change_set.pk).exists())
+
+
+class BatchedRevisionsTests(TestCase):
+    def setUp(self):
+        # the content type of the model is cached after the first save
+        Draft.objects.create(title='Draft', text='Text')
+
+    def test_bulk_insert(self):
+        """
+        The changesets and change records of several saves should be inserted with one bulk create each
+        """
+        # the savepoint of the batch, the inserts of the drafts, and one insert of the changesets and change records
+        with self.assertNumQueries(7):
+            with RevisionModelMixin.batched_revisions():
+                drafts = [Draft.objects.create(title='Draft %d' % i, text='Text') for i in range(3)]
+
+        for draft in drafts:
+            change_set = draft.changesets.get()
+            self.assertEqual(change_set.changeset_type, ChangeSet.INSERT_TYPE)
+            self.assertEqual(list(change_set.change_records.values_list('field_name', 'new_value')), [
+                ('text', 'Text'),
+                ('title', draft.title),
+            ])
+
+    def test_nested_batches(self):
+        """
+        Nested batches should be saved by the outermost batch
+        """
+        with RevisionModelMixin.batched_revisions():
+            with RevisionModelMixin.batched_revisions():
+                draft = Draft.objects.create(title='Draft', text='Text')
+
+            self.assertFalse(draft.changesets.exists())
+
+        self.assertEqual(draft.changesets.get().changeset_type, ChangeSet.INSERT_TYPE)
+
+    def test_create_and_update(self):
+        """
+        A create and an update of the same object within a batch should be saved as separate changesets
+        """
+        with RevisionModelMixin.batched_revisions():
+            draft = Draft.objects.create(title='Draft', text='Text')
+            draft.title = 'Changed draft'
+            draft.save()
+
+        self.assertEqual(
+            sorted(draft.changesets.values_list('changeset_type', flat=True)),
+            [ChangeSet.INSERT_TYPE, ChangeSet.UPDATE_TYPE]
+        )
+        change_set = draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'old_value', 'new_value')), [
+            ('title', 'Draft', 'Changed draft'),
+        ])
+
+    def test_many_to_many_changes(self):
+        """
+        Changes of many to many fields within a batch should be saved when the batch is left
+        """
+        item = Item.objects.create(name='Item')
+        tag = Tag.objects.create(name='Tag')
+
+        with RevisionModelMixin.batched_revisions():
+            item.tags.add(tag)
+
+            self.assertEqual(item.changesets.count(), 1)
+
+        change_set = item.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'new_value')), [
+            ('tags', str(tag.pk)),
+        ])
+
+    def test_aggregate_saves_of_same_object(self):
+        """
+        With aggregate=True, the changes of several saves of an object within a batch should be merged into a single
+        changeset
+        """
+        with RevisionModelMixin.batched_revisions(aggregate=True):
+            draft = Draft.objects.create(title='Draft', text='Text')
+            draft.title = 'Changed draft'
+            draft.save()
+            draft.text = 'Changed text'
+            draft.save()
+
+        change_set = draft.changesets.get()
+        self.assertEqual(change_set.changeset_type, ChangeSet.INSERT_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'old_value', 'new_value')), [
+            ('text', None, 'Changed text'),
+            ('title', None, 'Changed draft'),
+        ])
+
+    def test_aggregate_drops_reverted_changes(self):
+        """
+        With aggregate=True, a field which is changed and reverted within a batch should not be recorded
+        """
+        draft = Draft.objects.get(title='Draft')
+
+        with RevisionModelMixin.batched_revisions(aggregate=True):
+            draft.title = 'Changed draft'
+            draft.save()
+            draft.text = 'Changed text'
+            draft.save()
+            draft.title = 'Draft'
+            draft.save()
+
+        change_set = draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(change_set.change_records.values_list('field_name', 'old_value', 'new_value')), [
+            ('text', 'Text', 'Changed text'),
+        ])
+
+        with RevisionModelMixin.batched_revisions(aggregate=True):
+            draft.title = 'Changed draft'
+            draft.save()
+            draft.title = 'Draft'
+            draft.save()
+
+        # a changeset without any changes is not saved at all
+        self.assertEqual(draft.changesets.count(), 2)
+
+    def test_aggregate_different_objects(self):
+        """
+        With aggregate=True, the changes of different objects should not be merged
+        """
+        first_draft = Draft.objects.get(title='Draft')
+        second_draft = Draft.objects.create(title='Second draft', text='Text')
+
+        with RevisionModelMixin.batched_revisions(aggregate=True):
+            first_draft.title = 'Changed draft'
+            first_draft.save()
+            second_draft.text = 'Changed text'
+            second_draft.save()
+            first_draft.text = 'Changed text'
+            first_draft.save()
+
+        first_change_set = first_draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(first_change_set.change_records.values_list('field_name', 'new_value')), [
+            ('text', 'Changed text'),
+            ('title', 'Changed draft'),
+        ])
+        second_change_set = second_draft.changesets.get(changeset_type=ChangeSet.UPDATE_TYPE)
+        self.assertEqual(list(second_change_set.change_records.values_list('field_name', 'new_value')), [
+            ('text', 'Changed text'),
+        ])
+
+
+class ChangeSetQuerySetMixinTests(TestCase):
+    def test_is_staff_or_created_by_current_user_returns_new_queryset(self):
+        """
+        Staff users should get a new queryset with all objects, which does not share the result cache of the original
+        queryset
+        """
+        class SurveyQuerySet(QuerySet, ChangeSetQuerySetMixin):
+            pass
+
+        Survey.objects.create(title='Survey')
+        staff_user = User.objects.create_user(username='staff', password='top_secret', is_staff=True)
+        token = set_current_request(SimpleNamespace(user=staff_user))
+
+        try:
+            queryset = SurveyQuerySet(model=Survey)
+            staff_queryset = queryset.is_staff_or_created_by_current_user()
+        finally:
+            current_request.reset(token)
+
+        self.assertIsNot(staff_queryset, queryset)
+        self.assertEqual(list(staff_queryset), list(Survey.objects.all()))
+        self.assertIsNone(queryset._result_cache)
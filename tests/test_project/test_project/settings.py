@@ -35,6 +35,7 @@ INSTALLED_APPS = (
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django_userforeignkey',
+    'django_changeset',
     'test_project.polls',
 )
 